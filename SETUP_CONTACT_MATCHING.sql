@@ -0,0 +1,29 @@
+-- ============================================
+-- Setup Contact Matching (Find Friends)
+-- ============================================
+-- Backs POST /api/users/contacts/match: contacts are looked up by the
+-- SHA-256 of their normalized email, so clients never have to upload
+-- plain addresses.
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Normalized email (trimmed, lowercased)
+ALTER TABLE public.users
+  ADD COLUMN IF NOT EXISTS email_normalized TEXT
+  GENERATED ALWAYS AS (lower(btrim(email))) STORED;
+
+-- Step 2: Hex SHA-256 of the normalized email
+ALTER TABLE public.users
+  ADD COLUMN IF NOT EXISTS email_hash TEXT
+  GENERATED ALWAYS AS (encode(sha256(convert_to(lower(btrim(email)), 'UTF8')), 'hex')) STORED;
+
+-- Step 3: Index both for set lookups (IN (...))
+CREATE INDEX IF NOT EXISTS users_email_normalized_idx
+  ON public.users (email_normalized);
+
+CREATE INDEX IF NOT EXISTS users_email_hash_idx
+  ON public.users (email_hash);
+
+-- Verify
+SELECT id, username, email_normalized, email_hash
+FROM public.users
+LIMIT 5;
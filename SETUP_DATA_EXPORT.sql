@@ -0,0 +1,47 @@
+-- ============================================
+-- Setup Data Export
+-- ============================================
+-- Backs GET /api/users/me/export and GET /api/admin/export.
+--
+-- Exports walk each table in id order (keyset pagination), filtered by
+-- owner for per-user exports. These indexes make every page a single
+-- index range scan however far into the export it is.
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Invite log (written by POST /api/invites/send when present).
+-- Exports skip it on deployments that never created it. Only the backend
+-- writes it (with the service role); users can read their own invites.
+CREATE TABLE IF NOT EXISTS public.friend_invites (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  inviter_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+  invitee_email TEXT NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE public.friend_invites ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own invites" ON public.friend_invites;
+CREATE POLICY "Users can view own invites"
+  ON public.friend_invites FOR SELECT
+  USING (auth.uid() = inviter_id);
+
+DROP POLICY IF EXISTS "Users can insert own invites" ON public.friend_invites;
+
+-- Step 2: Per-user keyset indexes
+CREATE INDEX IF NOT EXISTS posts_user_id_id_idx
+  ON public.posts (user_id, id);
+
+CREATE INDEX IF NOT EXISTS likes_user_id_id_idx
+  ON public.likes (user_id, id);
+
+CREATE INDEX IF NOT EXISTS friend_invites_inviter_id_id_idx
+  ON public.friend_invites (inviter_id, id);
+
+-- Verify
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE indexname IN (
+  'posts_user_id_id_idx',
+  'likes_user_id_id_idx',
+  'friend_invites_inviter_id_id_idx'
+);
@@ -0,0 +1,233 @@
+-- ============================================
+-- Setup Follows and the Home Feed
+-- ============================================
+-- Backs POST/DELETE /api/users/{user_id}/follow and GET /api/posts/home.
+--
+-- New posts are fanned out on write into each follower's home timeline
+-- (capped per user). Authors with more followers than the fan-out limit
+-- are skipped on write and merged in at read time instead, so one post
+-- never writes to millions of timelines.
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Follows
+CREATE TABLE IF NOT EXISTS public.follows (
+  follower_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+  followee_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (follower_id, followee_id),
+  CHECK (follower_id <> followee_id)
+);
+
+-- Fan-out reads followers of an author
+CREATE INDEX IF NOT EXISTS follows_followee_idx
+  ON public.follows (followee_id);
+
+ALTER TABLE public.follows ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Follows are viewable by everyone" ON public.follows;
+CREATE POLICY "Follows are viewable by everyone"
+  ON public.follows FOR SELECT
+  USING (true);
+
+-- Step 2: Follower counts, kept current by a trigger
+ALTER TABLE public.users
+  ADD COLUMN IF NOT EXISTS followers_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION update_followers_count()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.users
+    SET followers_count = followers_count + 1
+    WHERE id = NEW.followee_id;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE public.users
+    SET followers_count = GREATEST(0, followers_count - 1)
+    WHERE id = OLD.followee_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS follows_count_trigger ON public.follows;
+CREATE TRIGGER follows_count_trigger
+  AFTER INSERT OR DELETE ON public.follows
+  FOR EACH ROW EXECUTE FUNCTION update_followers_count();
+
+-- Read-time merge looks up an author's latest posts
+CREATE INDEX IF NOT EXISTS posts_user_created_at_idx
+  ON public.posts (user_id, created_at DESC);
+
+-- Step 3: Materialized home timelines (post IDs only)
+CREATE TABLE IF NOT EXISTS public.home_timelines (
+  user_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
+  post_id UUID REFERENCES public.posts(id) ON DELETE CASCADE NOT NULL,
+  author_id UUID NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  PRIMARY KEY (user_id, post_id)
+);
+
+-- A page read is one range scan on this index
+CREATE INDEX IF NOT EXISTS home_timelines_user_created_at_idx
+  ON public.home_timelines (user_id, created_at DESC, post_id);
+
+CREATE INDEX IF NOT EXISTS home_timelines_post_idx
+  ON public.home_timelines (post_id);
+
+-- Only the backend (service role) touches this table
+ALTER TABLE public.home_timelines ENABLE ROW LEVEL SECURITY;
+
+-- Step 4: Trim a timeline to its newest p_cap entries
+CREATE OR REPLACE FUNCTION trim_home_timelines(p_user_ids UUID[], p_cap INTEGER)
+RETURNS VOID AS $$
+BEGIN
+  DELETE FROM public.home_timelines AS t
+  USING (
+    SELECT user_id, post_id,
+           row_number() OVER (PARTITION BY user_id ORDER BY created_at DESC, post_id DESC) AS position
+    FROM public.home_timelines
+    WHERE user_id = ANY(p_user_ids)
+  ) AS ranked
+  WHERE t.user_id = ranked.user_id
+    AND t.post_id = ranked.post_id
+    AND ranked.position > p_cap;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 5: Fan a new post out to its author's followers (and the author).
+-- Returns the number of timelines written; 0 for high-follower authors.
+CREATE OR REPLACE FUNCTION fan_out_post(
+  p_post_id UUID,
+  p_author_id UUID,
+  p_created_at TIMESTAMP WITH TIME ZONE,
+  p_max_followers INTEGER,
+  p_cap INTEGER
+)
+RETURNS INTEGER AS $$
+DECLARE
+  recipients UUID[];
+BEGIN
+  IF (SELECT followers_count FROM public.users WHERE id = p_author_id) > p_max_followers THEN
+    recipients := ARRAY[p_author_id];
+  ELSE
+    SELECT array_agg(follower_id) || p_author_id INTO recipients
+    FROM public.follows
+    WHERE followee_id = p_author_id;
+    recipients := coalesce(recipients, ARRAY[p_author_id]);
+  END IF;
+
+  INSERT INTO public.home_timelines (user_id, post_id, author_id, created_at)
+  SELECT r, p_post_id, p_author_id, p_created_at
+  FROM unnest(recipients) AS r
+  ON CONFLICT DO NOTHING;
+
+  PERFORM trim_home_timelines(recipients, p_cap);
+
+  RETURN array_length(recipients, 1);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 6: Follow / unfollow, backfilling or clearing the follower's timeline
+CREATE OR REPLACE FUNCTION follow_user(
+  p_follower_id UUID,
+  p_followee_id UUID,
+  p_max_followers INTEGER,
+  p_cap INTEGER
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+  INSERT INTO public.follows (follower_id, followee_id)
+  VALUES (p_follower_id, p_followee_id)
+  ON CONFLICT DO NOTHING;
+
+  IF NOT FOUND THEN
+    RETURN FALSE;
+  END IF;
+
+  -- High-follower authors are merged at read time, nothing to backfill
+  IF (SELECT followers_count FROM public.users WHERE id = p_followee_id) <= p_max_followers THEN
+    INSERT INTO public.home_timelines (user_id, post_id, author_id, created_at)
+    SELECT p_follower_id, p.id, p.user_id, p.created_at
+    FROM public.posts AS p
+    WHERE p.user_id = p_followee_id
+    ORDER BY p.created_at DESC
+    LIMIT p_cap
+    ON CONFLICT DO NOTHING;
+
+    PERFORM trim_home_timelines(ARRAY[p_follower_id], p_cap);
+  END IF;
+
+  RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION unfollow_user(p_follower_id UUID, p_followee_id UUID)
+RETURNS BOOLEAN AS $$
+BEGIN
+  DELETE FROM public.follows
+  WHERE follower_id = p_follower_id AND followee_id = p_followee_id;
+
+  IF NOT FOUND THEN
+    RETURN FALSE;
+  END IF;
+
+  DELETE FROM public.home_timelines
+  WHERE user_id = p_follower_id AND author_id = p_followee_id;
+
+  RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 7: One page of a home feed: the materialized timeline merged with
+-- the latest posts of followed high-follower authors. Keyset-paginated on
+-- (created_at DESC, post_id DESC); each source reads at most p_limit rows.
+CREATE OR REPLACE FUNCTION home_feed_page(
+  p_user_id UUID,
+  p_limit INTEGER,
+  p_max_followers INTEGER,
+  p_before_created_at TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+  p_before_id UUID DEFAULT NULL
+)
+RETURNS TABLE (post_id UUID, created_at TIMESTAMP WITH TIME ZONE) AS $$
+  WITH timeline AS (
+    SELECT t.post_id, t.created_at
+    FROM public.home_timelines AS t
+    WHERE t.user_id = p_user_id
+      AND (p_before_created_at IS NULL
+           OR (t.created_at, t.post_id) < (p_before_created_at, p_before_id))
+    ORDER BY t.created_at DESC, t.post_id DESC
+    LIMIT p_limit
+  ),
+  merged AS (
+    SELECT latest.id AS post_id, latest.created_at
+    FROM public.follows AS f
+    JOIN public.users AS u ON u.id = f.followee_id
+    CROSS JOIN LATERAL (
+      SELECT p.id, p.created_at
+      FROM public.posts AS p
+      WHERE p.user_id = f.followee_id
+        AND (p_before_created_at IS NULL
+             OR (p.created_at, p.id) < (p_before_created_at, p_before_id))
+      ORDER BY p.created_at DESC, p.id DESC
+      LIMIT p_limit
+    ) AS latest
+    WHERE f.follower_id = p_user_id
+      AND u.followers_count > p_max_followers
+  )
+  SELECT post_id, created_at
+  FROM (SELECT * FROM timeline UNION SELECT * FROM merged) AS feed
+  ORDER BY created_at DESC, post_id DESC
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+-- Step 8: These take user IDs as arguments, so only the backend may call them
+REVOKE EXECUTE ON FUNCTION trim_home_timelines(UUID[], INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION fan_out_post(UUID, UUID, TIMESTAMP WITH TIME ZONE, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION follow_user(UUID, UUID, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION unfollow_user(UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION home_feed_page(UUID, INTEGER, INTEGER, TIMESTAMP WITH TIME ZONE, UUID) FROM PUBLIC, anon, authenticated;
+
+-- Verify
+SELECT follower_id, followee_id, created_at
+FROM public.follows
+LIMIT 5;
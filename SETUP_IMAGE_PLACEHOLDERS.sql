@@ -0,0 +1,73 @@
+-- ============================================
+-- Setup Image Dimensions and Placeholders on Posts
+-- ============================================
+-- Width, height and a tiny inline placeholder (LQIP data URI) are computed
+-- once when an image is uploaded through the backend, stored with the blob,
+-- and copied onto the post when it is created. GET /api/posts/ returns them
+-- so the feed can lay out cards before images load.
+-- Requires SETUP_MEDIA_DEDUP.sql to have been run first.
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Store metadata alongside each blob
+ALTER TABLE public.media_blobs
+  ADD COLUMN IF NOT EXISTS width INTEGER,
+  ADD COLUMN IF NOT EXISTS height INTEGER,
+  ADD COLUMN IF NOT EXISTS placeholder TEXT;
+
+-- Step 2: Add the cover image metadata to posts
+ALTER TABLE public.posts
+  ADD COLUMN IF NOT EXISTS image_width INTEGER,
+  ADD COLUMN IF NOT EXISTS image_height INTEGER,
+  ADD COLUMN IF NOT EXISTS image_placeholder TEXT;
+
+-- Step 3: Register blobs together with their metadata
+DROP FUNCTION IF EXISTS register_media_blob(TEXT, TEXT, TEXT, TEXT, INTEGER);
+CREATE OR REPLACE FUNCTION register_media_blob(
+  p_bucket TEXT,
+  p_hash TEXT,
+  p_path TEXT,
+  p_content_type TEXT,
+  p_size INTEGER,
+  p_width INTEGER DEFAULT NULL,
+  p_height INTEGER DEFAULT NULL,
+  p_placeholder TEXT DEFAULT NULL
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+  inserted BOOLEAN;
+BEGIN
+  INSERT INTO public.media_blobs (
+    bucket, content_hash, path, content_type, size_bytes, width, height, placeholder
+  )
+  VALUES (
+    p_bucket, p_hash, p_path, p_content_type, p_size, p_width, p_height, p_placeholder
+  )
+  -- An unreferenced blob gets a fresh grace period (see SETUP_MEDIA_DEDUP.sql)
+  ON CONFLICT (bucket, content_hash) DO UPDATE
+    SET released_at = NOW()
+    WHERE public.media_blobs.ref_count = 0
+  RETURNING (xmax = 0) INTO inserted;
+  RETURN COALESCE(inserted, FALSE);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 4: Return the stored metadata when taking references, so creating a
+-- post needs no extra lookup
+DROP FUNCTION IF EXISTS acquire_media_blobs(TEXT, TEXT[]);
+CREATE OR REPLACE FUNCTION acquire_media_blobs(p_bucket TEXT, p_hashes TEXT[])
+RETURNS TABLE (content_hash TEXT, width INTEGER, height INTEGER, placeholder TEXT) AS $$
+BEGIN
+  RETURN QUERY
+  UPDATE public.media_blobs AS m
+  SET ref_count = m.ref_count + 1,
+      released_at = NULL
+  WHERE m.bucket = p_bucket
+    AND m.content_hash = ANY(p_hashes)
+  RETURNING m.content_hash, m.width, m.height, m.placeholder;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 5: Redefining the functions resets their grants, so revoke again:
+-- only the backend (service role) may call them
+REVOKE EXECUTE ON FUNCTION register_media_blob(TEXT, TEXT, TEXT, TEXT, INTEGER, INTEGER, INTEGER, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION acquire_media_blobs(TEXT, TEXT[]) FROM PUBLIC, anon, authenticated;
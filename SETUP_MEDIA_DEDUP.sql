@@ -0,0 +1,111 @@
+-- ============================================
+-- Setup Content-Hash Deduplication for Uploaded Images
+-- ============================================
+-- Images uploaded through the backend (POST /api/posts/upload and
+-- POST /api/users/me/avatar) are stored once per unique content, under
+-- blobs/<sha256>.<ext> in the posts/avatars buckets. This table tracks
+-- each blob and how many posts/profiles reference it.
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Create the blob registry
+CREATE TABLE IF NOT EXISTS public.media_blobs (
+  bucket TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  path TEXT NOT NULL,
+  content_type TEXT,
+  size_bytes INTEGER,
+  ref_count INTEGER NOT NULL DEFAULT 0 CHECK (ref_count >= 0),
+  -- Set when ref_count drops to zero; NULL while the blob is referenced
+  released_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (bucket, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS media_blobs_released_idx
+  ON public.media_blobs (released_at)
+  WHERE ref_count = 0;
+
+-- Only the backend (service role) touches this table
+ALTER TABLE public.media_blobs ENABLE ROW LEVEL SECURITY;
+
+-- Step 2: Register a blob. Returns TRUE when the caller must upload it,
+-- FALSE when an identical blob is already stored. Re-registering an
+-- unreferenced blob restarts its grace period, so it is not purged before
+-- the upload that found it is attached to a post or profile.
+CREATE OR REPLACE FUNCTION register_media_blob(
+  p_bucket TEXT,
+  p_hash TEXT,
+  p_path TEXT,
+  p_content_type TEXT,
+  p_size INTEGER
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+  inserted BOOLEAN;
+BEGIN
+  INSERT INTO public.media_blobs (bucket, content_hash, path, content_type, size_bytes)
+  VALUES (p_bucket, p_hash, p_path, p_content_type, p_size)
+  ON CONFLICT (bucket, content_hash) DO UPDATE
+    SET released_at = NOW()
+    WHERE public.media_blobs.ref_count = 0
+  RETURNING (xmax = 0) INTO inserted;
+  RETURN COALESCE(inserted, FALSE);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 3: Take a reference on blobs (post created, avatar set)
+CREATE OR REPLACE FUNCTION acquire_media_blobs(p_bucket TEXT, p_hashes TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  UPDATE public.media_blobs
+  SET ref_count = ref_count + 1,
+      released_at = NULL
+  WHERE bucket = p_bucket
+    AND content_hash = ANY(p_hashes);
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 4: Drop a reference on blobs (post deleted, avatar replaced)
+CREATE OR REPLACE FUNCTION release_media_blobs(p_bucket TEXT, p_hashes TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  UPDATE public.media_blobs
+  SET ref_count = GREATEST(0, ref_count - 1),
+      released_at = CASE WHEN ref_count <= 1 THEN NOW() ELSE NULL END
+  WHERE bucket = p_bucket
+    AND content_hash = ANY(p_hashes);
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 5: Claim blobs that have been unreferenced for longer than the grace
+-- period. The backend deletes the returned objects from storage.
+CREATE OR REPLACE FUNCTION purge_released_media_blobs(p_grace_seconds INTEGER)
+RETURNS TABLE (bucket TEXT, path TEXT) AS $$
+BEGIN
+  RETURN QUERY
+  DELETE FROM public.media_blobs AS m
+  WHERE m.ref_count = 0
+    AND m.released_at < NOW() - make_interval(secs => p_grace_seconds)
+  RETURNING m.bucket, m.path;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Step 6: Reference counts decide when images are deleted, so only the
+-- backend (service role) may call these
+REVOKE EXECUTE ON FUNCTION register_media_blob(TEXT, TEXT, TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION acquire_media_blobs(TEXT, TEXT[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_media_blobs(TEXT, TEXT[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION purge_released_media_blobs(INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- Verify the table was created
+SELECT bucket, COUNT(*) AS blobs, SUM(ref_count) AS references
+FROM public.media_blobs
+GROUP BY bucket;
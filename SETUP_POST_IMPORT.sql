@@ -0,0 +1,25 @@
+-- ============================================
+-- Setup Bulk Post Import
+-- ============================================
+-- Backs POST /api/admin/posts/import and scripts/import_posts.py.
+--
+-- Imports insert posts in large batches, so tag counts are added once per
+-- batch (tag -> number of new posts using it) instead of once per post.
+-- Run this SQL in your Supabase SQL Editor
+-- (after SETUP_TAG_INDEX.sql)
+
+-- Step 1: Add several posts' worth of tag counts at once
+CREATE OR REPLACE FUNCTION add_tag_counts(p_tags TEXT[], p_counts INTEGER[])
+RETURNS VOID AS $$
+  INSERT INTO public.tag_counts (tag, post_count)
+  SELECT t.tag, t.post_count
+  FROM unnest(p_tags, p_counts) AS t(tag, post_count)
+  ON CONFLICT (tag) DO UPDATE
+    SET post_count = public.tag_counts.post_count + EXCLUDED.post_count;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+-- Step 2: Only the backend may call it
+REVOKE EXECUTE ON FUNCTION add_tag_counts(TEXT[], INTEGER[]) FROM PUBLIC, anon, authenticated;
+
+-- Verify
+SELECT proname FROM pg_proc WHERE proname = 'add_tag_counts';
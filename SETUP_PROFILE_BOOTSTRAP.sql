@@ -0,0 +1,32 @@
+-- ============================================
+-- Setup Profile Bootstrap for /api/users/me
+-- ============================================
+-- Creates the caller's profile on first login and returns it, in a single
+-- statement. Existing profiles are returned untouched (no UPDATE, so
+-- updated_at and the profile ETag stay stable).
+-- Run this SQL in your Supabase SQL Editor
+
+CREATE OR REPLACE FUNCTION bootstrap_user_profile(
+  p_id UUID,
+  p_email TEXT,
+  p_username TEXT,
+  p_first_name TEXT,
+  p_last_name TEXT,
+  p_avatar_url TEXT
+)
+RETURNS SETOF public.users AS $$
+  WITH inserted AS (
+    INSERT INTO public.users (id, email, username, first_name, last_name, avatar_url)
+    VALUES (p_id, p_email, p_username, p_first_name, p_last_name, p_avatar_url)
+    ON CONFLICT (id) DO NOTHING
+    RETURNING *
+  )
+  SELECT * FROM inserted
+  UNION ALL
+  SELECT * FROM public.users
+  WHERE id = p_id
+    AND NOT EXISTS (SELECT 1 FROM inserted);
+$$ LANGUAGE sql SECURITY DEFINER;
+
+-- Takes the user ID as an argument, so only the backend may call it
+REVOKE EXECUTE ON FUNCTION bootstrap_user_profile(UUID, TEXT, TEXT, TEXT, TEXT, TEXT) FROM PUBLIC, anon, authenticated;
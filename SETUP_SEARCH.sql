@@ -0,0 +1,140 @@
+-- ============================================
+-- Setup Post and User Search
+-- ============================================
+-- Backs GET /api/search/posts, GET /api/search/users and
+-- GET /api/search/users/autocomplete.
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Trigram matching (typo-tolerant, partial words)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Step 2: Full-text document for posts: tags weigh more than the caption.
+-- array_to_string() is only STABLE, so wrap it for the generated column.
+CREATE OR REPLACE FUNCTION public.post_search_document(p_caption TEXT, p_tags TEXT[])
+RETURNS tsvector AS $$
+  SELECT setweight(to_tsvector('simple', array_to_string(coalesce(p_tags, '{}'), ' ')), 'A')
+      || setweight(to_tsvector('simple', coalesce(p_caption, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE public.posts
+  ADD COLUMN IF NOT EXISTS search_vector tsvector
+  GENERATED ALWAYS AS (public.post_search_document(caption, tags)) STORED;
+
+CREATE INDEX IF NOT EXISTS posts_search_vector_idx
+  ON public.posts USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS posts_caption_trgm_idx
+  ON public.posts USING GIN (caption gin_trgm_ops);
+
+-- Step 3: User name indexes
+CREATE INDEX IF NOT EXISTS users_username_trgm_idx
+  ON public.users USING GIN (username gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS users_full_name_trgm_idx
+  ON public.users USING GIN ((coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops);
+
+-- Byte-ordered index for username prefix lookups (autocomplete)
+CREATE INDEX IF NOT EXISTS users_username_prefix_idx
+  ON public.users ((lower(username) COLLATE "C"));
+
+-- Step 4: Ranked post search, keyset-paginated on (rank DESC, id)
+CREATE OR REPLACE FUNCTION public.search_posts(
+  p_query TEXT,
+  p_limit INTEGER DEFAULT 20,
+  p_after_rank REAL DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  user_id UUID,
+  caption TEXT,
+  post_type TEXT,
+  image_url TEXT,
+  tags TEXT[],
+  likes_count INTEGER,
+  created_at TIMESTAMP WITH TIME ZONE,
+  updated_at TIMESTAMP WITH TIME ZONE,
+  image_width INTEGER,
+  image_height INTEGER,
+  image_placeholder TEXT,
+  rank REAL
+) AS $$
+  WITH q AS (
+    SELECT websearch_to_tsquery('simple', p_query) AS tsq
+  ),
+  matches AS (
+    SELECT p.*,
+           (ts_rank(p.search_vector, q.tsq) + similarity(coalesce(p.caption, ''), p_query))::REAL AS rank
+    FROM public.posts AS p, q
+    WHERE p.search_vector @@ q.tsq
+       OR p.caption % p_query
+  )
+  SELECT m.id, m.user_id, m.caption, m.post_type, m.image_url, m.tags, m.likes_count,
+         m.created_at, m.updated_at, m.image_width, m.image_height, m.image_placeholder,
+         m.rank
+  FROM matches AS m
+  WHERE p_after_rank IS NULL
+     OR m.rank < p_after_rank
+     OR (m.rank = p_after_rank AND m.id > p_after_id)
+  ORDER BY m.rank DESC, m.id
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Step 5: Ranked user search by username or name, same pagination
+CREATE OR REPLACE FUNCTION public.search_users(
+  p_query TEXT,
+  p_limit INTEGER DEFAULT 20,
+  p_after_rank REAL DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  username TEXT,
+  first_name TEXT,
+  last_name TEXT,
+  avatar_url TEXT,
+  rank REAL
+) AS $$
+  WITH matches AS (
+    SELECT u.*,
+           GREATEST(
+             similarity(coalesce(u.username, ''), p_query),
+             similarity(coalesce(u.first_name, '') || ' ' || coalesce(u.last_name, ''), p_query)
+           )::REAL AS rank
+    FROM public.users AS u
+    WHERE u.username % p_query
+       OR (coalesce(u.first_name, '') || ' ' || coalesce(u.last_name, '')) % p_query
+  )
+  SELECT m.id, m.username, m.first_name, m.last_name, m.avatar_url, m.rank
+  FROM matches AS m
+  WHERE p_after_rank IS NULL
+     OR m.rank < p_after_rank
+     OR (m.rank = p_after_rank AND m.id > p_after_id)
+  ORDER BY m.rank DESC, m.id
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Step 6: Username prefix autocomplete (index range scan, no ranking)
+CREATE OR REPLACE FUNCTION public.autocomplete_usernames(
+  p_prefix TEXT,
+  p_limit INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  id UUID,
+  username TEXT,
+  first_name TEXT,
+  last_name TEXT,
+  avatar_url TEXT
+) AS $$
+  SELECT u.id, u.username, u.first_name, u.last_name, u.avatar_url
+  FROM public.users AS u
+  WHERE lower(u.username) COLLATE "C" LIKE
+        replace(replace(replace(lower(p_prefix), '\', '\\'), '%', '\%'), '_', '\_') || '%'
+  ORDER BY lower(u.username) COLLATE "C"
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Verify
+SELECT id, caption, rank FROM public.search_posts('sunset', 5);
+SELECT id, username, rank FROM public.search_users('john', 5);
+SELECT id, username FROM public.autocomplete_usernames('jo', 5);
@@ -0,0 +1,67 @@
+-- ============================================
+-- Setup Tag Index and Tag Counts
+-- ============================================
+-- Backs GET /api/posts/?tag=... (array containment / overlap on posts.tags)
+-- and GET /api/posts/tags (most used tags).
+-- Run this SQL in your Supabase SQL Editor
+
+-- Step 1: Index tags for @> (all tags) and && (any tag) filters
+CREATE INDEX IF NOT EXISTS posts_tags_gin_idx
+  ON public.posts USING GIN (tags);
+
+-- The tag filter is combined with ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS posts_created_at_idx
+  ON public.posts (created_at DESC);
+
+-- Step 2: Tag -> number of posts, maintained by the backend on
+-- create/update/delete so counting never scans the posts table
+CREATE TABLE IF NOT EXISTS public.tag_counts (
+  tag TEXT PRIMARY KEY,
+  post_count INTEGER NOT NULL DEFAULT 0 CHECK (post_count >= 0)
+);
+
+CREATE INDEX IF NOT EXISTS tag_counts_post_count_idx
+  ON public.tag_counts (post_count DESC);
+
+ALTER TABLE public.tag_counts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Tag counts are viewable by everyone" ON public.tag_counts;
+CREATE POLICY "Tag counts are viewable by everyone"
+  ON public.tag_counts FOR SELECT
+  USING (true);
+
+-- Step 3: Apply one post's tag changes
+CREATE OR REPLACE FUNCTION adjust_tag_counts(p_added TEXT[], p_removed TEXT[])
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.tag_counts (tag, post_count)
+  SELECT DISTINCT t, 1 FROM unnest(p_added) AS t
+  ON CONFLICT (tag) DO UPDATE
+    SET post_count = public.tag_counts.post_count + 1;
+
+  UPDATE public.tag_counts
+  SET post_count = GREATEST(0, post_count - 1)
+  WHERE tag = ANY(p_removed);
+
+  DELETE FROM public.tag_counts
+  WHERE tag = ANY(p_removed) AND post_count = 0;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Only the backend (service role) may change the counts
+REVOKE EXECUTE ON FUNCTION adjust_tag_counts(TEXT[], TEXT[]) FROM PUBLIC, anon, authenticated;
+
+-- Step 4: Backfill (or rebuild) the counts from existing posts
+INSERT INTO public.tag_counts (tag, post_count)
+SELECT t, COUNT(DISTINCT p.id)
+FROM public.posts AS p
+CROSS JOIN LATERAL unnest(p.tags) AS t
+GROUP BY t
+ON CONFLICT (tag) DO UPDATE
+  SET post_count = EXCLUDED.post_count;
+
+-- Verify
+SELECT tag, post_count
+FROM public.tag_counts
+ORDER BY post_count DESC
+LIMIT 20;
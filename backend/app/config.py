@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: str = ""
 
+    # Read replicas (comma-separated API URLs). Pure reads go to a replica,
+    # except for a user's own reads shortly after they wrote something.
+    supabase_read_replica_urls: Union[str, List[str]] = ""
+    read_replica_sticky_seconds: float = 5.0
+
     # CORS - can be a comma-separated string or list
     allowed_origins: Union[str, List[str]] = "http://localhost:3000,http://127.0.0.1:3000"
 
@@ -36,12 +41,114 @@ class Settings(BaseSettings):
     smtp_from_name: str = "POSTCARD"
     frontend_url: str = "http://localhost:3000"
 
-    @field_validator('allowed_origins', mode='before')
+    # Shared HTTP connection pool for Supabase (PostgREST, Auth, Storage)
+    http2: bool = True
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_connect_timeout_seconds: float = 5.0
+    http_read_timeout_seconds: float = 20.0
+    http_write_timeout_seconds: float = 20.0
+    http_pool_timeout_seconds: float = 5.0
+
+    # Upstream resilience: total time per operation (all attempts), circuit
+    # breakers, retries for idempotent reads and hedged reads
+    rest_deadline_seconds: float = 5.0
+    auth_deadline_seconds: float = 5.0
+    storage_deadline_seconds: float = 30.0
+    smtp_timeout_seconds: float = 10.0
+    upstream_failure_threshold: int = 5
+    upstream_reset_timeout_seconds: float = 10.0
+    read_retry_attempts: int = 2
+    read_retry_backoff_seconds: float = 0.05
+    hedge_delay_seconds: float = 0.1
+    hedge_max_workers: int = 8
+
+    # Adaptive concurrency limit (AIMD on response latency)
+    concurrency_initial_limit: int = 20
+    concurrency_min_limit: int = 4
+    concurrency_max_limit: int = 200
+    concurrency_latency_target_seconds: float = 1.0
+    # Feed pages at or beyond this offset are shed first
+    concurrency_deep_page_offset: int = 100
+
+    # Responses smaller than this many bytes are sent uncompressed
+    compression_minimum_size: int = 1024
+
+    # Live feed (server-sent events)
+    feed_heartbeat_seconds: float = 15.0
+    feed_queue_size: int = 100
+
+    # Trending feed
+    trending_half_life_hours: float = 12.0
+    trending_window_hours: float = 72.0
+    trending_max_posts: int = 1000
+    trending_rebuild_seconds: float = 300.0
+
+    # Media storage
+    media_orphan_grace_seconds: int = 86400
+
+    # Private media buckets (comma-separated): responses carry signed URLs
+    # for their objects, cached until refresh_margin before they expire
+    private_media_buckets: Union[str, List[str]] = ""
+    signed_url_ttl_seconds: int = 3600
+    signed_url_refresh_margin_seconds: int = 300
+    signed_url_cache_max_entries: int = 10000
+
+    # Per-process post and user row caches
+    cache_ttl_seconds: float = 30.0
+    cache_max_entries: int = 10000
+    batch_max_ids: int = 100
+    profile_cache_ttl_seconds: float = 300.0
+
+    # Idempotency-Key results for retried writes (per process)
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_max_keys: int = 10000
+
+    # Home feed: timelines keep this many posts; authors with more followers
+    # than the fan-out limit are merged in at read time instead
+    home_feed_timeline_length: int = 800
+    home_feed_fanout_max_followers: int = 10000
+
+    # Find friends
+    contact_match_max: int = 5000
+
+    # Data export: rows fetched per keyset page
+    export_page_size: int = 1000
+
+    # Bulk post import: rows per multi-row insert, inserts in flight, and
+    # how many per-row errors a report lists
+    import_batch_size: int = 500
+    import_max_parallel: int = 4
+    import_max_errors: int = 1000
+
+    # Security log analysis keeps hourly aggregates this long
+    security_log_retention_hours: int = 168
+
+    # Startup warmup: connections opened up front, newest feed pages and
+    # their authors' profiles preloaded into the row caches
+    warmup_enabled: bool = True
+    warmup_connections: int = 4
+    warmup_feed_pages: int = 3
+    warmup_timeout_seconds: float = 15.0
+
+    # Readiness probe (/ready): per-upstream probe timeout, and how long a
+    # probe result is reused across load balancer checks
+    ready_probe_timeout_seconds: float = 2.0
+    ready_probe_cache_seconds: float = 5.0
+
+    # Admins (comma-separated user IDs) may use the /api/admin endpoints
+    admin_user_ids: Union[str, List[str]] = ""
+
+    @field_validator(
+        'allowed_origins', 'supabase_read_replica_urls', 'admin_user_ids', 'private_media_buckets',
+        mode='before',
+    )
     @classmethod
     def split_origins(cls, v):
         """Convert comma-separated string to list."""
         if isinstance(v, str):
-            return [origin.strip() for origin in v.split(',')]
+            return [origin.strip() for origin in v.split(',') if origin.strip()]
         return v
 
     class Config:
@@ -1,21 +1,145 @@
 """Supabase client configuration."""
 
-from supabase import create_client, Client
+import itertools
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
 from app.config import settings
+from app.http_pool import use_shared_pool
+from app.resilience import CircuitBreaker, breaker_for
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+def _create_pooled_client(url: str, key: str) -> "Client":
+    """Create a Supabase client that uses the shared connection pool."""
+    # Imported here: the supabase package (realtime, storage, functions
+    # clients) is a noticeable share of worker boot time
+    from supabase import create_client
 
+    client = create_client(url, key)
+    use_shared_pool(client)
+    return client
 
-def get_supabase_client() -> Client:
+
+def get_supabase_client() -> "Client":
     """Create and return Supabase client instance."""
-    return create_client(settings.supabase_url, settings.supabase_key)
+    return _create_pooled_client(settings.supabase_url, settings.supabase_key)
 
 
-def get_supabase_admin_client() -> Client:
+def get_supabase_admin_client() -> "Client":
     """Create and return Supabase admin client with service role key."""
     if settings.supabase_service_key:
-        return create_client(settings.supabase_url, settings.supabase_service_key)
+        return _create_pooled_client(settings.supabase_url, settings.supabase_service_key)
     return get_supabase_client()
 
 
-# Initialize clients
-supabase: Client = get_supabase_client()
-supabase_admin: Client = get_supabase_admin_client()
+def get_supabase_replica_clients() -> List["LazyClient"]:
+    """Anon clients for the configured read replicas, created on first use."""
+    return [
+        LazyClient(lambda url=url: _create_pooled_client(url, settings.supabase_key))
+        for url in settings.supabase_read_replica_urls
+    ]
+
+
+class LazyClient:
+    """
+    A Supabase client that is created on first use.
+
+    Creating a client builds its PostgREST, Auth, Storage and Realtime
+    sub-clients; deferring that keeps it out of worker boot, and processes
+    that never touch a client (scripts, tooling) never pay for it.
+    Attribute access is forwarded, so it stands in for a ``Client``.
+    """
+
+    def __init__(self, factory: Callable[[], "Client"]):
+        self._factory = factory
+        self._client: Optional["Client"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+    def get(self) -> "Client":
+        """Return the client, creating it if needed (thread-safe)."""
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+class ReadRouter:
+    """
+    Route pure reads to read replicas and everything else to the primary.
+
+    Replicas lag the primary slightly, so a user who just wrote something
+    keeps reading from the primary for ``sticky_seconds`` and sees their
+    own change. Replicas whose circuit breaker is open are skipped, and
+    reads fall back to the primary when no replica is healthy.
+
+    The read-your-writes window is tracked per process.
+    """
+
+    # Bound on remembered writers; expired entries are pruned past this
+    MAX_TRACKED_WRITERS = 10000
+
+    def __init__(self, primary: "Client", replicas: List["Client"], sticky_seconds: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self._next_replica = itertools.cycle(range(len(replicas)))
+        self._recent_writers: Dict[str, float] = {}
+
+    def mark_write(self, user_id: str):
+        """Keep a user's reads on the primary for the next few seconds."""
+        if not self.replicas:
+            return
+
+        now = time.monotonic()
+        if len(self._recent_writers) >= self.MAX_TRACKED_WRITERS:
+            self._recent_writers = {
+                writer: until for writer, until in self._recent_writers.items() if until > now
+            }
+        self._recent_writers[user_id] = now + self.sticky_seconds
+
+    def client(self, user_id: Optional[str] = None) -> "Client":
+        """
+        Pick the client for a pure read.
+
+        Args:
+            user_id: The reader, if known, for read-your-writes stickiness
+        """
+        if not self.replicas:
+            return self.primary
+
+        if user_id is not None and self._recent_writers.get(user_id, 0) > time.monotonic():
+            return self.primary
+
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next_replica)]
+            if self._breaker(replica).state != CircuitBreaker.OPEN:
+                return replica
+        return self.primary
+
+    @staticmethod
+    def _breaker(client: "Client") -> CircuitBreaker:
+        return breaker_for("rest", client.postgrest.session.base_url.host)
+
+
+# Clients are created on first use, see LazyClient
+supabase: "Client" = LazyClient(get_supabase_client)
+supabase_admin: "Client" = LazyClient(get_supabase_admin_client)
+read_router = ReadRouter(
+    supabase,
+    get_supabase_replica_clients(),
+    sticky_seconds=settings.read_replica_sticky_seconds,
+)
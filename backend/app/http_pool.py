@@ -0,0 +1,147 @@
+"""Shared HTTP connection pool for the Supabase clients."""
+
+import importlib.util
+import logging
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import settings
+from app.resilience import ResilientTransport
+
+logger = logging.getLogger(__name__)
+
+# Checked without importing h2; httpx imports it when the pool is created
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def create_transport() -> httpx.HTTPTransport:
+    """Create the connection pool from the HTTP settings."""
+    http2 = settings.http2 and HTTP2_AVAILABLE
+    if settings.http2 and not HTTP2_AVAILABLE:
+        logger.warning("h2 is not installed, Supabase connections will use HTTP/1.1")
+
+    return httpx.HTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+    )
+
+
+def create_timeout() -> httpx.Timeout:
+    """Per-call timeouts from the HTTP settings."""
+    return httpx.Timeout(
+        connect=settings.http_connect_timeout_seconds,
+        read=settings.http_read_timeout_seconds,
+        write=settings.http_write_timeout_seconds,
+        pool=settings.http_pool_timeout_seconds,
+    )
+
+
+# One pool for PostgREST, Auth and Storage, for both the anon and admin
+# clients, behind per-upstream deadlines and circuit breakers. Created with
+# the first client, so importing the app does not build SSL contexts.
+_shared_transport: Optional[ResilientTransport] = None
+_shared_transport_lock = threading.Lock()
+shared_timeout = create_timeout()
+
+
+def shared_transport() -> ResilientTransport:
+    """Return the shared pool, creating it on first use."""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = ResilientTransport(create_transport())
+    return _shared_transport
+
+
+def close_shared_pool():
+    """Close the shared pool's connections (at shutdown)."""
+    if _shared_transport is not None:
+        _shared_transport.close()
+
+
+def pooled(session: httpx.Client) -> httpx.Client:
+    """
+    Rebuild an httpx client on the shared pool.
+
+    The Supabase sub-clients create their own ``httpx.Client`` (and so their
+    own connection pool); this keeps the base URL, headers and redirect
+    policy of the original and swaps in the shared transport and timeouts.
+    """
+    replacement = type(session)(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=shared_timeout,
+        follow_redirects=session.follow_redirects,
+        transport=shared_transport(),
+    )
+    session.close()
+    return replacement
+
+
+def use_shared_pool(client):
+    """
+    Route all of a Supabase client's HTTP traffic through the shared pool.
+
+    The client builds its PostgREST and Storage sub-clients on first use
+    and rebuilds them after every sign-in, token refresh and sign-out, so
+    the pool is installed in the factories that build them rather than
+    swapped into the current instances. The Auth client is built once,
+    with the client.
+
+    Args:
+        client: A ``supabase.Client``
+    """
+    init_postgrest_client = client._init_postgrest_client
+    init_storage_client = client._init_storage_client
+
+    def _init_postgrest_client(*args, **kwargs):
+        postgrest = init_postgrest_client(*args, **kwargs)
+        postgrest.session = pooled(postgrest.session)
+        return postgrest
+
+    def _init_storage_client(*args, **kwargs):
+        storage = init_storage_client(*args, **kwargs)
+        storage.session = storage._client = pooled(storage.session)
+        return storage
+
+    client._init_postgrest_client = _init_postgrest_client
+    client._init_storage_client = _init_storage_client
+    # Drop sub-clients already built on their own pools
+    client._postgrest = None
+    client._storage = None
+
+    auth = client.auth
+    auth._http_client = pooled(auth._http_client)
+    auth.admin._http_client = auth._http_client
+
+
+def pool_stats() -> Dict:
+    """
+    Report the shared pool's configuration and current connections.
+
+    Returns:
+        Limits, plus connection counts: ``active`` connections are serving a
+        request, ``idle`` ones are kept alive for reuse, and
+        ``pending_requests`` are waiting for a free connection
+    """
+    pool = _shared_transport.transport._pool if _shared_transport is not None else None
+    connections = list(pool.connections) if pool is not None else []
+    idle = sum(1 for connection in connections if connection.is_idle())
+
+    return {
+        "http2": settings.http2 and HTTP2_AVAILABLE,
+        "max_connections": settings.http_max_connections,
+        "max_keepalive_connections": settings.http_max_keepalive_connections,
+        "keepalive_expiry_seconds": settings.http_keepalive_expiry_seconds,
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "pending_requests": len(getattr(pool, "_requests", [])),
+    }
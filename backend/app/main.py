@@ -1,21 +1,91 @@
 """FastAPI main application."""
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.config import settings
-from app.routes import auth, posts, users, invites
+from app.http_pool import close_shared_pool, pool_stats
+from app.resilience import UpstreamUnavailable, find_upstream_failure, retry_after_header, upstream_stats
+from app.routes import admin, auth, posts, users, invites, search
 from app.middleware.security import SecurityHeadersMiddleware
-from app.middleware.monitoring import SecurityMonitoringMiddleware
+from app.middleware.monitoring import SecurityMonitoringMiddleware, configure_logging
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.concurrency import AdaptiveLimiter, ConcurrencyLimitMiddleware
+from app.utils.trending import trending_index
+from app.warmup import readiness, warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop the app's background work.
+
+    Nothing expensive happens at import: log handlers, Supabase clients and
+    the connection pool are all set up here or on first use, so workers
+    boot fast. Caches and connections are then warmed in the background;
+    /ready reports the worker as ready once that is done.
+    """
+    configure_logging()
+
+    if settings.warmup_enabled:
+        warmup_task = asyncio.create_task(warmup.run(
+            settings.warmup_connections,
+            settings.warmup_feed_pages,
+            settings.warmup_timeout_seconds,
+        ))
+    else:
+        warmup_task = None
+        warmup.skip()
+
+    # Load the trending index and keep rebuilding it in the background
+    trending_task = asyncio.create_task(
+        trending_index.run_periodic_rebuild(settings.trending_rebuild_seconds)
+    )
+    app.state.trending_task = trending_task
+
+    yield
+
+    for task in (warmup_task, trending_task):
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    close_shared_pool()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="Backend API for PostcardsTo - A social media platform for photos and stories",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+# Compress JSON responses (innermost, so other middleware sees final headers)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
 # Add security monitoring middleware
 app.add_middleware(SecurityMonitoringMiddleware)
 
+# Shed load with fast 503s once the adaptive concurrency limit is reached
+concurrency_limiter = AdaptiveLimiter(
+    initial_limit=settings.concurrency_initial_limit,
+    min_limit=settings.concurrency_min_limit,
+    max_limit=settings.concurrency_max_limit,
+    latency_target=settings.concurrency_latency_target_seconds,
+)
+app.add_middleware(
+    ConcurrencyLimitMiddleware,
+    limiter=concurrency_limiter,
+    deep_page_offset=settings.concurrency_deep_page_offset,
+)
+
 # Add security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 
@@ -28,11 +98,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+def upstream_unavailable_response(failure: UpstreamUnavailable) -> ORJSONResponse:
+    """Fast 503 telling the client when to retry."""
+    return ORJSONResponse(
+        status_code=503,
+        content={"detail": str(failure)},
+        headers=retry_after_header(failure),
+    )
+
+
+@app.exception_handler(UpstreamUnavailable)
+async def handle_upstream_unavailable(request: Request, exc: UpstreamUnavailable):
+    """Upstream failures that escaped a route."""
+    return upstream_unavailable_response(exc)
+
+
+@app.exception_handler(StarletteHTTPException)
+async def handle_http_exception(request: Request, exc: StarletteHTTPException):
+    """
+    Turn route errors caused by an upstream failure into 503s.
+
+    Routes wrap failures as ``HTTPException(400, "Could not ...")``; when
+    the underlying cause was an unavailable upstream the client should
+    retry later rather than treat its request as bad.
+    """
+    failure = find_upstream_failure(exc)
+    if failure is not None:
+        return upstream_unavailable_response(failure)
+    return await http_exception_handler(request, exc)
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(posts.router, prefix="/api/posts", tags=["Posts"])
 app.include_router(invites.router, prefix="/api/invites", tags=["Invites"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -49,3 +152,34 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe for load balancers.
+
+    200 once startup warmup has finished and PostgREST, Auth and Storage
+    all answer; 503 otherwise. Reports upstream latency, warmup steps and
+    the connection pool, unlike /health, which only says the process is up.
+    """
+    report = await readiness.check()
+    return ORJSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+
+@app.get("/health/pool")
+async def connection_pool_stats():
+    """Shared Supabase connection pool statistics."""
+    return pool_stats()
+
+
+@app.get("/health/upstreams")
+async def upstream_health():
+    """Circuit breaker state of each upstream (REST, Auth, Storage, SMTP)."""
+    return upstream_stats()
+
+
+@app.get("/health/concurrency")
+async def concurrency_stats():
+    """Adaptive concurrency limit, in-flight requests and shed counts."""
+    return concurrency_limiter.stats()
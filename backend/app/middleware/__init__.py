@@ -2,5 +2,12 @@
 
 from .security import SecurityHeadersMiddleware
 from .monitoring import SecurityMonitoringMiddleware
+from .compression import CompressionMiddleware
+from .concurrency import ConcurrencyLimitMiddleware
 
-__all__ = ['SecurityHeadersMiddleware', 'SecurityMonitoringMiddleware']
+__all__ = [
+    'SecurityHeadersMiddleware',
+    'SecurityMonitoringMiddleware',
+    'CompressionMiddleware',
+    'ConcurrencyLimitMiddleware',
+]
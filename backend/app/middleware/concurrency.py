@@ -0,0 +1,187 @@
+"""Adaptive concurrency limiting with priority-based load shedding."""
+
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Priorities, highest first
+CRITICAL = "critical"
+NORMAL = "normal"
+BULK = "bulk"
+
+# Share of the current limit each priority may fill. Lower priorities are
+# refused first as the server fills up, keeping room for critical requests.
+PRIORITY_SHARES = {
+    CRITICAL: 1.0,
+    NORMAL: 0.8,
+    BULK: 0.5,
+}
+
+# Cheap endpoints that must answer even under overload, and long-lived
+# streams and imports that would hold a slot (and skew latency) for their
+# whole life
+EXEMPT_PATHS = (
+    "/",
+    "/health",
+    "/ready",
+    "/api/posts/stream",
+    "/api/users/me/export",
+    "/api/admin/export",
+    "/api/admin/posts/import",
+)
+EXEMPT_PREFIXES = ("/health/",)
+
+
+def request_priority(method: str, path: str, query_string: bytes, deep_page_offset: int) -> str:
+    """
+    Classify a request for load shedding.
+
+    Critical: token refresh and likes (small, latency-sensitive writes).
+    Bulk: invites, batch and contact lookups, and feed pages deep enough
+    that nobody is waiting on them interactively. Everything else is normal.
+    """
+    if path == "/api/auth/refresh" or path.endswith("/like"):
+        return CRITICAL
+
+    if (
+        path.startswith("/api/invites")
+        or path.endswith("/batch")
+        or path == "/api/users/contacts/match"
+    ):
+        return BULK
+
+    if method == "GET" and path == "/api/posts/" and query_string:
+        skip = parse_qs(query_string.decode("latin-1")).get("skip", ["0"])[0]
+        if skip.isdigit() and int(skip) >= deep_page_offset:
+            return BULK
+
+    return NORMAL
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit driven by observed latency.
+
+    Every request that completes within the latency target grows the limit
+    additively (by about one per "limit" requests); a slow or overloaded
+    (503) completion shrinks it multiplicatively, at most once per target
+    interval so one burst of slow requests counts as one signal. The limit
+    therefore settles near the concurrency the upstreams can actually serve
+    without queueing.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        backoff_ratio: float = 0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.inflight = 0
+        self.shed: Dict[str, int] = {priority: 0 for priority in PRIORITY_SHARES}
+        self._last_decrease = 0.0
+
+    def try_acquire(self, priority: str) -> bool:
+        """Admit a request if its priority's share of the limit has room."""
+        if self.inflight >= max(1, int(self.limit * PRIORITY_SHARES[priority])):
+            self.shed[priority] += 1
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: float, overloaded: bool):
+        """Record a finished request and adapt the limit."""
+        self.inflight -= 1
+        now = time.monotonic()
+
+        if overloaded or latency > self.latency_target:
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict:
+        """Current limit, in-flight requests and shed counts, for monitoring."""
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "shed": dict(self.shed),
+        }
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Shed excess requests with a fast 503 instead of queueing them.
+
+    Requests over their priority's share of the adaptive limit are refused
+    immediately with ``Retry-After``, so a traffic spike cannot pile up
+    requests waiting on Supabase until every response (and the health
+    check) times out. Latency is measured to the start of the response.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: AdaptiveLimiter,
+        deep_page_offset: int = 100,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.deep_page_offset = deep_page_offset
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(
+            scope["method"], path, scope.get("query_string", b""), self.deep_page_offset
+        )
+        if not self.limiter.try_acquire(priority):
+            await self._reject(send)
+            return
+
+        start = time.monotonic()
+        first_byte: Optional[Tuple[float, int]] = None
+
+        async def send_wrapper(message: Message):
+            nonlocal first_byte
+            if message["type"] == "http.response.start" and first_byte is None:
+                first_byte = (time.monotonic() - start, message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if first_byte is None:
+                # No response started: the app raised, treat as overload
+                self.limiter.release(time.monotonic() - start, overloaded=True)
+            else:
+                latency, status_code = first_byte
+                self.limiter.release(latency, overloaded=status_code == 503)
+
+    async def _reject(self, send: Send):
+        body = orjson.dumps({"detail": "Server is busy, please retry shortly"})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
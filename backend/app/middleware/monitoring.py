@@ -11,27 +11,35 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict
 
-# Create logs directory if it doesn't exist
 logs_dir = Path(__file__).parent.parent.parent / 'logs'
-logs_dir.mkdir(exist_ok=True)
 log_file = logs_dir / 'security.log'
 
-# Configure logging
-handlers = [logging.StreamHandler()]
+logger = logging.getLogger('security')
 
-# Try to add file handler, but don't fail if we can't
-try:
-    handlers.append(logging.FileHandler(str(log_file)))
-except Exception as e:
-    print(f"Warning: Could not create log file: {e}")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=handlers
-)
+def configure_logging():
+    """
+    Set up console and security.log handlers.
 
-logger = logging.getLogger('security')
+    Called from the app's startup hook rather than at import, so importing
+    the app (scripts, tooling) does not create log files.
+    """
+    # Create logs directory if it doesn't exist
+    logs_dir.mkdir(exist_ok=True)
+
+    handlers = [logging.StreamHandler()]
+
+    # Try to add file handler, but don't fail if we can't
+    try:
+        handlers.append(logging.FileHandler(str(log_file)))
+    except Exception as e:
+        print(f"Warning: Could not create log file: {e}")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
 
 
 class SecurityMonitoringMiddleware(BaseHTTPMiddleware):
@@ -118,7 +126,8 @@ class SecurityMonitoringMiddleware(BaseHTTPMiddleware):
             logger.error(f"Server error: {log_data}")
         elif response.status_code >= 400:
             logger.warning(f"Client error: {log_data}")
-        elif response.status_code >= 300:
+        elif response.status_code >= 300 and response.status_code != 304:
+            # 304 Not Modified is a successful conditional GET, not a redirect
             logger.info(f"Redirect: {log_data}")
         else:
             logger.debug(f"Success: {log_data}")
@@ -0,0 +1,370 @@
+"""Deadlines, circuit breakers, retries and hedging for upstream calls."""
+
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Methods that are safe to send twice
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Upstream responses that mean "unavailable right now", not "bad request"
+UNAVAILABLE_STATUS_CODES = {502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream service is down, overloaded, or did not answer in time."""
+
+    def __init__(self, upstream: str, retry_after: float = 1.0):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        super().__init__(f"{upstream} is temporarily unavailable")
+
+
+def find_upstream_failure(exc: BaseException) -> Optional[UpstreamUnavailable]:
+    """
+    Find an UpstreamUnavailable in an exception's cause/context chain.
+
+    Routes and client libraries re-raise upstream failures as their own
+    errors (e.g. ``HTTPException(400)``, ``AuthRetryableError``) from inside
+    ``except`` blocks, so the original failure is kept as the context.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, UpstreamUnavailable):
+            return exc
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an upstream is down.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls are rejected immediately for ``reset_timeout`` seconds. Then a
+    single probe call is let through (half-open): success closes the
+    breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Check that a call may proceed.
+
+        Raises:
+            UpstreamUnavailable: If the breaker is open
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise UpstreamUnavailable(self.name, retry_after=remaining)
+                self.state = self.HALF_OPEN
+                self._probing = False
+
+            # Half-open: let exactly one probe through
+            if self._probing:
+                raise UpstreamUnavailable(self.name, retry_after=1.0)
+            self._probing = True
+
+    def record_success(self):
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Count a failed call, opening the breaker at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def end_probe(self):
+        """
+        Let the next half-open call probe again.
+
+        Called once a call is over however it ended, so a probe that
+        neither succeeded nor failed (e.g. an unexpected exception) cannot
+        keep the breaker half-open and rejecting every call.
+        """
+        if not self._probing:
+            return
+        with self._lock:
+            self._probing = False
+
+    def call(self, fn: Callable[[], T], is_failure: Callable[[Exception], bool] = lambda e: True) -> T:
+        """
+        Run ``fn`` through the breaker.
+
+        Args:
+            fn: The upstream call
+            is_failure: Whether an exception means the upstream is unhealthy;
+                other exceptions (e.g. a rejected request) are re-raised and
+                count as a success, since the upstream did answer
+        """
+        self.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        finally:
+            self.end_probe()
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        """Current state, for monitoring."""
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.upstream_failure_threshold,
+        reset_timeout=settings.upstream_reset_timeout_seconds,
+    )
+
+
+# One breaker per upstream, shared by the anon and admin clients
+breakers: Dict[str, CircuitBreaker] = {
+    "rest": _breaker("rest"),
+    "auth": _breaker("auth"),
+    "storage": _breaker("storage"),
+    "smtp": _breaker("smtp"),
+}
+
+_primary_host = httpx.URL(settings.supabase_url).host
+
+
+def breaker_for(upstream: str, host: str) -> CircuitBreaker:
+    """
+    Get the breaker for an upstream on a given host.
+
+    Read replicas get breakers of their own, so a failing replica does not
+    cut off the primary.
+    """
+    if host == _primary_host:
+        return breakers[upstream]
+    name = f"{upstream}@{host}"
+    if name not in breakers:
+        breakers.setdefault(name, _breaker(name))
+    return breakers[name]
+
+
+# Supabase URL path prefix -> (breaker, deadline in seconds for one operation)
+_UPSTREAM_ROUTES = {
+    "/rest/v1/": ("rest", settings.rest_deadline_seconds),
+    "/auth/v1/": ("auth", settings.auth_deadline_seconds),
+    "/storage/v1/": ("storage", settings.storage_deadline_seconds),
+}
+
+
+def retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (0-based)."""
+    return random.uniform(0, settings.read_retry_backoff_seconds * (2 ** attempt))
+
+
+def _on_event_loop() -> bool:
+    """Whether the current thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _timeout_within(timeout: Optional[dict], remaining: float) -> dict:
+    """Cap every phase of an httpx request timeout at the remaining deadline."""
+    timeout = timeout or {}
+    return {
+        phase: remaining if timeout.get(phase) is None else min(timeout[phase], remaining)
+        for phase in ("connect", "read", "write", "pool")
+    }
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    Wrap the shared connection pool with per-upstream deadlines and breakers.
+
+    Every Supabase request (PostgREST, Auth, Storage) passes through here.
+    Each operation gets a deadline covering all of its attempts; idempotent
+    reads are retried with jittered backoff on connection errors, timeouts
+    and 502/503/504. When an upstream keeps failing its breaker opens and
+    requests fail immediately with UpstreamUnavailable instead of waiting
+    out timeouts.
+
+    The Supabase clients are synchronous, so when they are called from an
+    async route the backoff sleeps block the event loop; there each sleep
+    is capped at the base backoff (``read_retry_backoff_seconds``).
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        route = next(
+            (route for prefix, route in _UPSTREAM_ROUTES.items() if request.url.path.startswith(prefix)),
+            None,
+        )
+        if route is None:
+            return self.transport.handle_request(request)
+
+        name, deadline_seconds = route
+        breaker = breaker_for(name, request.url.host)
+        breaker.before_call()
+        try:
+            return self._send_with_retries(request, breaker, deadline_seconds)
+        finally:
+            breaker.end_probe()
+
+    def _send_with_retries(
+        self, request: httpx.Request, breaker: CircuitBreaker, deadline_seconds: float
+    ) -> httpx.Response:
+        deadline = time.monotonic() + deadline_seconds
+        attempts = 1
+        if request.method in IDEMPOTENT_METHODS:
+            attempts += settings.read_retry_attempts
+
+        error = None
+        for attempt in range(attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            request.extensions = {
+                **request.extensions,
+                "timeout": _timeout_within(request.extensions.get("timeout"), remaining),
+            }
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                error = repr(e)
+            else:
+                if response.status_code not in UNAVAILABLE_STATUS_CODES:
+                    breaker.record_success()
+                    return response
+                response.close()
+                error = f"HTTP {response.status_code}"
+
+            if attempt + 1 < attempts:
+                delay = retry_delay(attempt)
+                if _on_event_loop():
+                    delay = min(delay, settings.read_retry_backoff_seconds)
+                time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+
+        breaker.record_failure()
+        logger.warning(f"{breaker.name} {request.method} {request.url.path} failed: {error or 'deadline exceeded'}")
+        raise UpstreamUnavailable(breaker.name)
+
+    def close(self):
+        self.transport.close()
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=settings.hedge_max_workers, thread_name_prefix="hedge")
+
+
+def hedged(
+    fn: Callable[[], T],
+    delay: Optional[float] = None,
+    upstream: str = "rest",
+    deadline_seconds: Optional[float] = None,
+) -> T:
+    """
+    Run an idempotent read, starting a second copy if the first is slow.
+
+    If ``fn`` has not returned within ``delay`` seconds, a duplicate is
+    started and whichever finishes first successfully wins. This trims tail
+    latency for hot single-row reads at the cost of occasional extra load.
+
+    The caller's thread waits for the copies, so async routes should call
+    this through ``asyncio.to_thread``; either way the wait never exceeds
+    ``deadline_seconds``.
+
+    Args:
+        fn: The read; must be safe to run twice
+        delay: Seconds before hedging (defaults to settings.hedge_delay_seconds;
+            0 disables hedging)
+        upstream: Upstream the read goes to, named in the error on timeout
+        deadline_seconds: Longest wait for a result (defaults to
+            settings.rest_deadline_seconds)
+
+    Raises:
+        UpstreamUnavailable: If no copy finished within the deadline
+    """
+    delay = settings.hedge_delay_seconds if delay is None else delay
+    if delay <= 0:
+        return fn()
+
+    deadline_seconds = settings.rest_deadline_seconds if deadline_seconds is None else deadline_seconds
+    deadline = time.monotonic() + deadline_seconds
+
+    first = _hedge_executor.submit(fn)
+    done, _ = wait([first], timeout=min(delay, deadline_seconds))
+    if done:
+        return first.result()
+
+    pending = {first, _hedge_executor.submit(fn)}
+    error = None
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    if pending:
+        logger.warning(f"Hedged {upstream} read did not finish within {deadline_seconds}s")
+        raise UpstreamUnavailable(upstream)
+    raise error
+
+
+def upstream_stats() -> Dict[str, Dict]:
+    """Breaker states for every upstream, for monitoring."""
+    return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+def retry_after_header(failure: UpstreamUnavailable) -> Dict[str, str]:
+    """Retry-After header for a 503 caused by an upstream failure."""
+    return {"Retry-After": str(max(1, math.ceil(failure.retry_after)))}
@@ -0,0 +1,74 @@
+"""Admin routes."""
+
+import asyncio
+from fastapi import APIRouter, Depends, Query, Request
+from app.config import settings
+from app.middleware.monitoring import log_file
+from app.schemas.post import PostImportReport
+from app.schemas.security_log import SecurityLogSummary
+from app.utils.auth import get_admin_user
+from app.utils.export import export_response, ndjson_export
+from app.utils.post_import import PostImporter, iter_lines
+from app.utils.security_log import SecurityLogAnalyzer, default_state_path
+from app.database import supabase_admin
+from typing import Dict
+
+router = APIRouter()
+
+security_log = SecurityLogAnalyzer(
+    log_file,
+    retention_hours=settings.security_log_retention_hours,
+    state_path=default_state_path(log_file),
+)
+
+
+@router.get("/export")
+async def export_all_data(
+    request: Request,
+    current_user: Dict = Depends(get_admin_user)
+):
+    """
+    Bulk dump of every post, like and invite as NDJSON.
+
+    Same format as `GET /api/users/me/export`, for all users.
+    """
+    # Use admin client to bypass RLS
+    return export_response(
+        ndjson_export(supabase_admin, settings.export_page_size),
+        request.headers.get("accept-encoding", ""),
+        filename="postcard-dump.ndjson",
+    )
+
+
+@router.post("/posts/import", response_model=PostImportReport)
+async def import_posts(
+    request: Request,
+    resume_from: int = Query(0, ge=0),
+    current_user: Dict = Depends(get_admin_user)
+):
+    """
+    Bulk import posts from an NDJSON request body, one `PostImport` per line.
+
+    The body is streamed, validated line by line and inserted in batches.
+    The report lists per-line errors and a `checkpoint`: if the run is
+    interrupted, send the same body again with `resume_from` set to it.
+    """
+    importer = PostImporter(resume_from=resume_from)
+    return await importer.run(iter_lines(request.stream()))
+
+
+@router.get("/security-log", response_model=SecurityLogSummary)
+async def security_log_summary(
+    hours: int = Query(24, ge=1),
+    top: int = Query(20, ge=1, le=1000),
+    current_user: Dict = Depends(get_admin_user)
+):
+    """
+    Security log activity over the last `hours` hours.
+
+    Top client IPs and paths, status counts, auth failures by IP and
+    security warnings. Only log lines written since the previous query are
+    read; older activity comes from the stored hourly aggregates (kept for
+    SECURITY_LOG_RETENTION_HOURS).
+    """
+    return await asyncio.to_thread(security_log.query, hours, top)
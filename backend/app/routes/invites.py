@@ -1,10 +1,14 @@
 """API routes for friend invites."""
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
 from pydantic import BaseModel, EmailStr
+from typing import Dict, Optional
 from app.utils.auth import get_current_user
 from app.utils.email import send_invite_email
-from app.database import supabase
+from app.utils.idempotency import idempotent
+from app.utils.projections import USER_DISPLAY_NAME_COLUMNS
+from app.database import supabase, supabase_admin
+from postgrest.types import ReturnMethod
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,21 +30,39 @@ class InviteResponse(BaseModel):
 @router.post("/send", response_model=InviteResponse)
 async def send_invite(
     invite: InviteRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Send an invite email to a friend.
 
+    Retries sent with the same `Idempotency-Key` header get the original
+    result back without sending the email again.
+
     Args:
         invite: Email address to send invite to
+        response: The response, marked when it is a replay
+        idempotency_key: Optional key identifying retries of one request
         current_user: Currently authenticated user
 
     Returns:
         Success status and message
     """
+    return await idempotent(
+        idempotency_key,
+        ("send_invite", current_user.id),
+        invite,
+        response,
+        lambda: _send_invite(invite, current_user),
+    )
+
+
+async def _send_invite(invite: InviteRequest, current_user: Dict) -> InviteResponse:
+    """Email the invite and record it."""
     try:
         # Get current user's profile to get their name
-        user_profile = supabase.table("users").select("first_name, last_name, username").eq("id", current_user["id"]).execute()
+        user_profile = supabase.table("users").select(USER_DISPLAY_NAME_COLUMNS).eq("id", current_user.id).execute()
 
         if not user_profile.data or len(user_profile.data) == 0:
             from_name = "A friend"
@@ -59,12 +81,13 @@ async def send_invite(
         success = await send_invite_email(invite.email, from_name)
 
         if success:
-            # Optional: Log the invite in database for tracking
+            # Optional: Log the invite in database for tracking.
+            # Use admin client to bypass RLS (users can only read their invites)
             try:
-                supabase.table("friend_invites").insert({
-                    "inviter_id": current_user["id"],
+                supabase_admin.table("friend_invites").insert({
+                    "inviter_id": current_user.id,
                     "invitee_email": invite.email
-                }).execute()
+                }, returning=ReturnMethod.minimal).execute()
             except Exception as e:
                 # Don't fail if logging fails
                 logger.warning(f"Failed to log invite: {str(e)}")
@@ -82,8 +105,9 @@ async def send_invite(
     except HTTPException:
         raise
     except Exception as e:
+        # Upstream failures become 503s in the app's exception handler
         logger.error(f"Error sending invite: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to send invite: {str(e)}"
+            detail="Failed to send invite"
         )
@@ -1,156 +1,516 @@
 """Post routes for photos and stories."""
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from app.schemas.post import Post, PostCreate, PostUpdate
-from app.utils.auth import get_current_user
-from app.database import supabase, supabase_admin
-from typing import Dict, List, Optional
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.resilience import hedged
+from app.schemas.post import Post, PostCreate, PostPage, PostUpdate, TagCount
+from app.schemas.media import MediaUpload
+from app.schemas.batch import BatchLookup, PostBatch
+from app.utils.auth import get_current_user, request_user_id
+from app.utils.idempotency import idempotent
+from app.utils.batch import queryable_ids
+from app.utils.cache import get_or_fetch_many, post_cache
+from app.utils.events import feed_events
+from app.utils.home_feed import fan_out_post, home_feed_page
+from app.utils.trending import trending_index
+from app.utils.responses import (
+    POST_MEDIA_FIELDS,
+    POST_VERSION_FIELDS,
+    RowSerializer,
+    if_match_version,
+    precondition_failed,
+    row_version,
+)
+from app.utils.signed_urls import canonical_media_url
+from app.utils.projections import (
+    LIKE_EXISTS_COLUMNS,
+    POST_COLUMNS,
+    POST_DELETE_COLUMNS,
+    POST_OWNER_COLUMNS,
+    TAG_COUNT_COLUMNS,
+)
+from app.utils.tags import MAX_FILTER_TAGS, adjust_tag_counts, array_values, normalize_filter_tags
+from app.utils.storage import (
+    POSTS_BUCKET,
+    acquire_images,
+    cover_image_fields,
+    purge_released_images,
+    release_images,
+    store_image,
+)
+from app.database import read_router, supabase, supabase_admin
+from postgrest.types import ReturnMethod
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import logging
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Feed pages return trusted rows straight from the posts table
+post_rows = RowSerializer(Post, POST_MEDIA_FIELDS)
+
+
+def _fetch_posts(post_ids: List[str], client: "Client" = supabase) -> List[dict]:
+    """Load posts by id in a single query."""
+    return client.table("posts").select(POST_COLUMNS).in_("id", post_ids).execute().data or []
+
 
 @router.post("/", response_model=Post, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post: PostCreate,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: Dict = Depends(get_current_user)
 ):
-    """Create a new post (photo or story)."""
+    """
+    Create a new post (photo or story).
+
+    Retries sent with the same `Idempotency-Key` header get the original
+    post back instead of creating a duplicate.
+    """
+    post.image_url = canonical_media_url(post.image_url)
+    created = await idempotent(
+        idempotency_key,
+        ("create_post", current_user.id),
+        post,
+        response,
+        lambda: _create_post(post, background_tasks, current_user),
+    )
+    # Signed after the idempotency store, so replays get fresh URLs
+    return post_rows.sign(created)
+
+
+async def _create_post(post: PostCreate, background_tasks: BackgroundTasks, current_user: Dict) -> dict:
+    """Insert a post and publish it to the feeds."""
     try:
         post_data = post.dict()
         post_data["user_id"] = current_user.id
 
+        # Reference deduplicated images before the post points at them, and
+        # copy the cover image's dimensions and placeholder onto the post
+        acquired = acquire_images(POSTS_BUCKET, post.image_url)
+        post_data.update(cover_image_fields(POSTS_BUCKET, post.image_url, acquired))
+
         # Use admin client to bypass RLS
-        response = supabase_admin.table("posts").insert(post_data).execute()
+        try:
+            response = supabase_admin.table("posts").insert(post_data).execute()
+        except Exception:
+            release_images(POSTS_BUCKET, post.image_url)
+            raise
 
         if not response.data:
+            release_images(POSTS_BUCKET, post.image_url)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Could not create post"
             )
 
+        adjust_tag_counts(None, response.data[0].get("tags"))
+        feed_events.publish("post_created", data=post_rows.dumps(response.data[0]))
+        trending_index.add_post(response.data[0])
+        background_tasks.add_task(
+            fan_out_post, response.data[0]["id"], current_user.id, response.data[0]["created_at"]
+        )
+        read_router.mark_write(current_user.id)
+
         return response.data[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Could not create post: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create post"
+        )
+
+
+@router.post("/upload", response_model=MediaUpload, status_code=status.HTTP_201_CREATED)
+async def upload_post_image(
+    file: UploadFile = File(...),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Upload a post image.
+
+    Identical images are stored once; re-uploading returns the existing URL.
+    Pass the returned URL as `image_url` when creating the post.
+    """
+    try:
+        stored = await store_image(file, POSTS_BUCKET)
+
+        return MediaUpload(
+            url=stored.url,
+            content_hash=stored.content_hash,
+            content_type=stored.content_type,
+            size=stored.size,
+            deduplicated=stored.deduplicated,
+            width=stored.width,
+            height=stored.height,
+            placeholder=stored.placeholder,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.error(f"Could not upload image: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not create post: {str(e)}"
+            detail="Could not upload image"
         )
 
 
 @router.get("/", response_model=List[Post])
 async def get_posts(
+    request: Request,
     skip: int = 0,
     limit: int = 20,
-    post_type: Optional[str] = None
+    post_type: Optional[str] = None,
+    tag: Optional[List[str]] = Query(None),
+    tag_match: str = Query("all", pattern="^(all|any)$")
 ):
-    """Get all posts with pagination."""
+    """
+    Get all posts with pagination.
+
+    Repeat `tag` to filter by several tags: `tag_match=all` (default) returns
+    posts with every tag, `tag_match=any` posts with at least one.
+    """
+    tags = normalize_filter_tags(tag)
+    if len(tags) > MAX_FILTER_TAGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many tags. Maximum: {MAX_FILTER_TAGS}"
+        )
+
     try:
-        query = supabase.table("posts").select("*")
+        # Pure read: served by a read replica when configured
+        db = read_router.client(request_user_id(request))
+        query = db.table("posts").select(POST_COLUMNS)
 
         if post_type:
             query = query.eq("post_type", post_type)
 
+        # Array containment/overlap, served by the GIN index on posts.tags
+        if tags and tag_match == "all":
+            query = query.cs("tags", array_values(tags))
+        elif tags:
+            query = query.ov("tags", array_values(tags))
+
         response = query.order("created_at", desc=True).range(skip, skip + limit - 1).execute()
 
+        return post_rows.conditional_response(request, response.data, POST_VERSION_FIELDS)
+    except Exception as e:
+        logger.error(f"Could not fetch posts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not fetch posts"
+        )
+
+
+@router.get("/home", response_model=PostPage)
+async def get_home_feed(
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Get the current user's home feed: their own posts and posts from
+    people they follow, newest first.
+
+    Reads a precomputed timeline, so the cost depends on the page size,
+    not on how many people the user follows. Pass `next_cursor` back as
+    `cursor` to get the next page.
+    """
+    try:
+        post_ids, next_cursor = home_feed_page(current_user.id, limit, cursor)
+        db = read_router.client(current_user.id)
+        posts = get_or_fetch_many(post_cache, post_ids, lambda ids: _fetch_posts(ids, db))
+
+        # Posts deleted since the page was read are skipped
+        return post_rows.page_response(
+            [posts[post_id] for post_id in post_ids if post_id in posts], next_cursor
+        )
+    except Exception as e:
+        logger.error(f"Could not fetch home feed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not fetch home feed"
+        )
+
+
+@router.get("/stream")
+async def stream_feed(request: Request):
+    """
+    Live feed updates as server-sent events.
+
+    Events: `post_created` and `post_updated` (the post), `post_deleted`
+    (`{"id"}`), `post_liked` (`{"id", "delta"}`), and `resync` when the
+    client fell behind and should refetch `GET /api/posts/`.
+    """
+    subscription = feed_events.subscribe()
+
+    return StreamingResponse(
+        feed_events.stream(
+            subscription,
+            settings.feed_heartbeat_seconds,
+            request.is_disconnected,
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events are delivered immediately
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/tags", response_model=List[TagCount])
+async def get_tag_counts(limit: int = 50):
+    """Get the most used tags with their post counts."""
+    try:
+        response = (
+            supabase.table("tag_counts")
+            .select(TAG_COUNT_COLUMNS)
+            .order("post_count", desc=True)
+            .limit(limit)
+            .execute()
+        )
+
         return response.data
     except Exception as e:
+        logger.error(f"Could not fetch tags: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not fetch posts: {str(e)}"
+            detail="Could not fetch tags"
         )
 
 
+@router.get("/trending", response_model=List[Post])
+async def get_trending_posts(
+    request: Request,
+    skip: int = 0,
+    limit: int = 20
+):
+    """
+    Get trending posts: most liked, with older posts decaying over time.
+
+    Served from an in-memory index that is updated on every post and like
+    and periodically rebuilt, so no database query runs per request.
+    """
+    return post_rows.conditional_response(
+        request, trending_index.top(skip, limit), POST_VERSION_FIELDS
+    )
+
+
 @router.get("/user/{user_id}", response_model=List[Post])
 async def get_user_posts(
     user_id: str,
+    request: Request,
     skip: int = 0,
     limit: int = 20
 ):
     """Get posts by specific user."""
     try:
+        db = read_router.client(request_user_id(request))
         response = (
-            supabase.table("posts")
-            .select("*")
+            db.table("posts")
+            .select(POST_COLUMNS)
             .eq("user_id", user_id)
             .order("created_at", desc=True)
             .range(skip, skip + limit - 1)
             .execute()
         )
 
-        return response.data
+        return post_rows.response(response.data)
+    except Exception as e:
+        logger.error(f"Could not fetch user posts: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not fetch user posts"
+        )
+
+
+@router.post("/batch", response_model=PostBatch)
+async def get_posts_batch(lookup: BatchLookup, request: Request):
+    """
+    Get several posts by ID in one request.
+
+    `results` follows the order of `ids`, with null for posts that do not
+    exist; their IDs are also listed in `missing`.
+    """
+    post_ids = queryable_ids(lookup.ids)
+
+    try:
+        db = read_router.client(request_user_id(request))
+        posts = get_or_fetch_many(post_cache, post_ids, lambda ids: _fetch_posts(ids, db))
+
+        return post_rows.batch_response(lookup.ids, posts)
     except Exception as e:
+        logger.error(f"Could not fetch posts: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not fetch user posts: {str(e)}"
+            detail="Could not fetch posts"
         )
 
 
 @router.get("/{post_id}", response_model=Post)
-async def get_post(post_id: str):
+async def get_post(post_id: str, request: Request):
     """Get a specific post by ID."""
     try:
-        response = supabase.table("posts").select("*").eq("id", post_id).execute()
-
-        if not response.data:
+        # Cache misses are hedged: a slow read is raced against a second copy.
+        # Waiting for the copies blocks, so it runs off the event loop.
+        db = read_router.client(request_user_id(request))
+        post = (await asyncio.to_thread(
+            get_or_fetch_many,
+            post_cache, [post_id], lambda post_ids: hedged(lambda: _fetch_posts(post_ids, db)),
+        )).get(post_id)
+
+        if post is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
 
-        return response.data[0]
+        return post_rows.conditional_response(request, post, POST_VERSION_FIELDS)
     except Exception as e:
+        logger.error(f"Could not fetch post: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not fetch post: {str(e)}"
+            detail="Could not fetch post"
+        )
+
+
+def _post_version(post_id: str, user_id: str, columns: str = POST_OWNER_COLUMNS) -> dict:
+    """
+    Read a post's owner, tags and version for an update.
+
+    Raises:
+        HTTPException: 404 if the post does not exist, 403 if it is not the user's
+    """
+    response = supabase.table("posts").select(columns).eq("id", post_id).execute()
+
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
+
+    if response.data[0]["user_id"] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this post"
         )
 
+    return response.data[0]
+
+
+def _post_etag(post: dict) -> Tuple[str, str]:
+    """A post's current ETag (as issued by GET) and version."""
+    return post_rows.entity_tag(post, POST_VERSION_FIELDS), post["updated_at"]
+
+
+def _raise_update_failure(post_id: str, user_id: str, client_version: Optional[str]):
+    """
+    Explain a guarded post UPDATE that matched no row.
+
+    Only runs on the failure path, so successful edits need no extra read.
+    """
+    _post_version(post_id, user_id)
+    if client_version is not None:
+        raise precondition_failed("Post")
+
+    # The post changed between reading its tags and updating it
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Post was modified concurrently, please retry"
+    )
+
 
 @router.put("/{post_id}", response_model=Post)
 @router.patch("/{post_id}", response_model=Post)
 async def update_post(
     post_id: str,
     post_update: PostUpdate,
+    if_match: Optional[str] = Header(None),
     current_user: Dict = Depends(get_current_user)
 ):
-    """Update a post."""
+    """
+    Update a post.
+
+    Send the `ETag` from `GET /api/posts/{post_id}`, or the post's
+    `updated_at`, as `If-Match` to update it only if nobody changed it
+    since; otherwise the update fails with 412. With `updated_at` and
+    unless tags change, the ownership check, the version check and the
+    write are a single UPDATE; an ETag costs one extra read.
+    """
     try:
-        # Check if post belongs to current user
-        post_response = supabase.table("posts").select("*").eq("id", post_id).execute()
+        client_version = if_match_version(
+            if_match,
+            lambda: _post_etag(_post_version(post_id, current_user.id, POST_COLUMNS)),
+            "Post",
+        )
+        expected_version = client_version
+        update_data = post_update.dict(exclude_unset=True)
+        previous_tags = None
+
+        if "tags" in update_data:
+            # Tag counts need the tags being replaced: read them, and only
+            # update the version that was read
+            current = _post_version(post_id, current_user.id)
+            expected_version = row_version(current["updated_at"])
+            if client_version is not None and client_version != expected_version:
+                raise precondition_failed("Post")
+            previous_tags = current.get("tags")
+
+        # Ownership and version are checked by the UPDATE itself.
+        # Use admin client to bypass RLS
+        query = (
+            supabase_admin.table("posts")
+            .update(update_data)
+            .eq("id", post_id)
+            .eq("user_id", current_user.id)
+        )
+        if expected_version is not None:
+            query = query.eq("updated_at", expected_version)
+        response = query.execute()
 
-        if not post_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
+        if not response.data:
+            _raise_update_failure(post_id, current_user.id, client_version)
 
-        if post_response.data[0]["user_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this post"
-            )
+        post_cache.invalidate(post_id)
 
-        update_data = post_update.dict(exclude_unset=True)
-        # Use admin client to bypass RLS
-        response = supabase_admin.table("posts").update(update_data).eq("id", post_id).execute()
+        if "tags" in update_data:
+            adjust_tag_counts(previous_tags, response.data[0].get("tags"))
+        feed_events.publish("post_updated", data=post_rows.dumps(response.data[0]))
+        trending_index.update_post(response.data[0])
+        read_router.mark_write(current_user.id)
 
-        return response.data[0]
+        return post_rows.sign(response.data[0])
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Could not update post: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not update post: {str(e)}"
+            detail="Could not update post"
         )
 
 
 @router.delete("/{post_id}")
 async def delete_post(
     post_id: str,
+    background_tasks: BackgroundTasks,
     current_user: Dict = Depends(get_current_user)
 ):
     """Delete a post."""
     try:
         # Check if post belongs to current user
-        post_response = supabase.table("posts").select("*").eq("id", post_id).execute()
+        post_response = supabase.table("posts").select(POST_DELETE_COLUMNS).eq("id", post_id).execute()
 
         if not post_response.data:
             raise HTTPException(
@@ -165,15 +525,26 @@ async def delete_post(
             )
 
         # Use admin client to bypass RLS
-        supabase_admin.table("posts").delete().eq("id", post_id).execute()
+        supabase_admin.table("posts").delete(returning=ReturnMethod.minimal).eq("id", post_id).execute()
+        post_cache.invalidate(post_id)
+
+        # Release deduplicated images; unreferenced blobs are purged later
+        release_images(POSTS_BUCKET, post_response.data[0].get("image_url"))
+        background_tasks.add_task(purge_released_images)
+
+        adjust_tag_counts(post_response.data[0].get("tags"), None)
+        feed_events.publish("post_deleted", {"id": post_id})
+        trending_index.remove_post(post_id)
+        read_router.mark_write(current_user.id)
 
         return {"message": "Post deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Could not delete post: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not delete post: {str(e)}"
+            detail="Could not delete post"
         )
 
 
@@ -187,7 +558,7 @@ async def like_post(
         # Check if already liked
         existing = (
             supabase.table("likes")
-            .select("*")
+            .select(LIKE_EXISTS_COLUMNS)
             .eq("post_id", post_id)
             .eq("user_id", current_user.id)
             .execute()
@@ -204,15 +575,21 @@ async def like_post(
         supabase_admin.table("likes").insert({
             "post_id": post_id,
             "user_id": current_user.id
-        }).execute()
+        }, returning=ReturnMethod.minimal).execute()
+        post_cache.invalidate(post_id)
+
+        feed_events.publish("post_liked", {"id": post_id, "delta": 1})
+        trending_index.adjust_likes(post_id, 1)
+        read_router.mark_write(current_user.id)
 
         return {"message": "Post liked successfully"}
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Could not like post: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not like post: {str(e)}"
+            detail="Could not like post"
         )
 
 
@@ -225,11 +602,25 @@ async def unlike_post(
     try:
         # Remove like - use admin client to bypass RLS
         # Note: likes_count is automatically updated by database trigger
-        supabase_admin.table("likes").delete().eq("post_id", post_id).eq("user_id", current_user.id).execute()
+        response = (
+            supabase_admin.table("likes")
+            .delete()
+            .eq("post_id", post_id)
+            .eq("user_id", current_user.id)
+            .execute()
+        )
+
+        # Only notify live clients if a like was actually removed
+        if response.data:
+            post_cache.invalidate(post_id)
+            feed_events.publish("post_liked", {"id": post_id, "delta": -1})
+            trending_index.adjust_likes(post_id, -1)
+            read_router.mark_write(current_user.id)
 
         return {"message": "Post unliked successfully"}
     except Exception as e:
+        logger.error(f"Could not unlike post: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not unlike post: {str(e)}"
+            detail="Could not unlike post"
         )
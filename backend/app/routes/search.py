@@ -0,0 +1,113 @@
+"""Search routes."""
+
+from fastapi import APIRouter, HTTPException, Query, status
+from app.schemas.post import Post
+from app.schemas.search import PostSearchResults, UserSearchResults
+from app.schemas.user import UserSummary
+from app.utils.responses import POST_MEDIA_FIELDS, USER_MEDIA_FIELDS, RowSerializer
+from app.utils.search import decode_cursor, next_cursor, normalize_query
+from app.database import supabase
+from typing import List, Optional
+
+router = APIRouter()
+
+post_rows = RowSerializer(Post, POST_MEDIA_FIELDS)
+user_summary_rows = RowSerializer(UserSummary, USER_MEDIA_FIELDS)
+
+
+def _search_params(q: str, limit: int, cursor: Optional[str]) -> dict:
+    """Build the search RPC parameters, validating the query and cursor."""
+    query = normalize_query(q)
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query cannot be empty"
+        )
+
+    params = {"p_query": query, "p_limit": limit}
+    if cursor:
+        try:
+            params["p_after_rank"], params["p_after_id"] = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    return params
+
+
+@router.get("/posts", response_model=PostSearchResults)
+async def search_posts(
+    q: str,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None
+):
+    """
+    Search post captions and tags.
+
+    Results are ranked by full-text relevance plus trigram similarity, so
+    partial words and small typos still match. Pass `next_cursor` back as
+    `cursor` to get the next page.
+    """
+    params = _search_params(q, limit, cursor)
+
+    try:
+        response = supabase.rpc("search_posts", params).execute()
+        rows = response.data or []
+
+        return post_rows.page_response(rows, next_cursor(rows, limit))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not search posts: {str(e)}"
+        )
+
+
+@router.get("/users", response_model=UserSearchResults)
+async def search_users(
+    q: str,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None
+):
+    """Search users by username or name, ranked by similarity."""
+    params = _search_params(q, limit, cursor)
+
+    try:
+        response = supabase.rpc("search_users", params).execute()
+        rows = response.data or []
+
+        return user_summary_rows.page_response(rows, next_cursor(rows, limit))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not search users: {str(e)}"
+        )
+
+
+@router.get("/users/autocomplete", response_model=List[UserSummary])
+async def autocomplete_usernames(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """
+    Complete a username prefix.
+
+    A single index range scan on the lowercased username, meant to be
+    called on every keystroke.
+    """
+    prefix = normalize_query(prefix)
+    if not prefix:
+        return user_summary_rows.response([])
+
+    try:
+        response = supabase.rpc("autocomplete_usernames", {
+            "p_prefix": prefix,
+            "p_limit": limit,
+        }).execute()
+
+        return user_summary_rows.response(response.data or [])
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not autocomplete usernames: {str(e)}"
+        )
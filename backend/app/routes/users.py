@@ -1,34 +1,81 @@
 """User routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.schemas.user import User, UserUpdate
-from app.utils.auth import get_current_user
-from app.database import supabase
-from typing import Dict
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, status, UploadFile, File
+from app.config import settings
+from app.schemas.user import ContactMatch, ContactMatchRequest, User, UserSummary, UserUpdate
+from app.schemas.batch import BatchLookup, UserBatch
+from app.utils.auth import get_current_user, request_user_id
+from app.utils.batch import queryable_ids
+from app.utils.cache import get_or_fetch_many, profile_cache, user_cache
+from app.utils.contacts import contact_hash, find_users_by_email_hash
+from app.utils.export import export_response, ndjson_export
+from app.utils.home_feed import follow_user, unfollow_user
+from app.utils.storage import (
+    AVATARS_BUCKET,
+    acquire_images,
+    purge_released_images,
+    release_images,
+    store_image,
+)
+from app.utils.projections import USER_COLUMNS, USER_EXISTS_COLUMNS
+from app.utils.responses import (
+    USER_MEDIA_FIELDS,
+    USER_VERSION_FIELDS,
+    RowSerializer,
+    if_match_version,
+    precondition_failed,
+    row_version,
+)
+from app.utils.signed_urls import canonical_media_url
+from app.database import read_router, supabase, supabase_admin
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 router = APIRouter()
 
+user_rows = RowSerializer(User, USER_MEDIA_FIELDS)
+user_summary_rows = RowSerializer(UserSummary, USER_MEDIA_FIELDS)
+
+
+def _fetch_users(user_ids: List[str], client: "Client" = supabase) -> List[dict]:
+    """Load user profiles by id in a single query."""
+    return client.table("users").select(USER_COLUMNS).in_("id", user_ids).execute().data or []
+
 
 @router.get("/me", response_model=User)
-async def get_current_user_profile(current_user: Dict = Depends(get_current_user)):
-    """Get current user profile."""
+async def get_current_user_profile(
+    request: Request,
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Get current user profile.
+
+    The profile is created on first login. After that it is served from
+    the profile cache without querying the database.
+    """
     try:
-        # Fetch user profile from users table
-        response = supabase.table("users").select("*").eq("id", current_user.id).execute()
+        profile = profile_cache.get(current_user.id)
 
-        if not response.data:
-            # If profile doesn't exist, create it
-            user_data = {
-                "id": current_user.id,
-                "email": current_user.email,
-                "username": current_user.user_metadata.get("username"),
-                "first_name": current_user.user_metadata.get("first_name"),
-                "last_name": current_user.user_metadata.get("last_name"),
-                "avatar_url": current_user.user_metadata.get("avatar_url"),
-            }
-            response = supabase.table("users").insert(user_data).execute()
-
-        return response.data[0]
+        if profile is None:
+            # Create the profile if it doesn't exist and return it, in one statement
+            # Use admin client to bypass RLS
+            response = supabase_admin.rpc("bootstrap_user_profile", {
+                "p_id": current_user.id,
+                "p_email": current_user.email,
+                "p_username": current_user.user_metadata.get("username"),
+                "p_first_name": current_user.user_metadata.get("first_name"),
+                "p_last_name": current_user.user_metadata.get("last_name"),
+                "p_avatar_url": current_user.user_metadata.get("avatar_url"),
+            }).execute()
+
+            profile = response.data[0]
+            profile_cache.set(current_user.id, profile)
+
+        return user_rows.conditional_response(
+            request, profile, USER_VERSION_FIELDS, cache_control="private, no-cache"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,24 +83,104 @@ async def get_current_user_profile(current_user: Dict = Depends(get_current_user
         )
 
 
+def _profile_etag(user_id: str) -> Tuple[str, str]:
+    """
+    A profile's current ETag (as issued by GET) and version.
+
+    Raises:
+        HTTPException: 404 if the profile does not exist
+    """
+    response = supabase.table("users").select(USER_COLUMNS).eq("id", user_id).execute()
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    profile = response.data[0]
+    return user_rows.entity_tag(profile, USER_VERSION_FIELDS), profile["updated_at"]
+
+
 @router.put("/me", response_model=User)
 async def update_current_user_profile(
     user_update: UserUpdate,
+    background_tasks: BackgroundTasks,
+    if_match: Optional[str] = Header(None),
     current_user: Dict = Depends(get_current_user)
 ):
-    """Update current user profile."""
+    """
+    Update current user profile.
+
+    Send the `ETag` from `GET /api/users/me`, or the profile's
+    `updated_at`, as `If-Match` to update it only if it was not changed
+    since (e.g. from another device); otherwise the update fails with 412.
+    The version check is part of the UPDATE itself; an ETag costs one
+    extra read. A new `avatar_url` must be an image that is still stored
+    (409 otherwise).
+    """
     try:
+        client_version = if_match_version(
+            if_match, lambda: _profile_etag(current_user.id), "Profile"
+        )
+        expected_version = client_version
         update_data = user_update.dict(exclude_unset=True)
+        previous_url = None
+        acquired_url = None
+
+        if "avatar_url" in update_data:
+            update_data["avatar_url"] = canonical_media_url(update_data["avatar_url"])
+
+            # The stored avatar's reference is released once it is replaced:
+            # read it, and only update the version that was read
+            current = supabase_admin.table("users").select(USER_COLUMNS).eq("id", current_user.id).execute()
+            if not current.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            expected_version = row_version(current.data[0]["updated_at"])
+            if client_version is not None and client_version != expected_version:
+                raise precondition_failed("Profile")
+
+            if update_data["avatar_url"] != current.data[0].get("avatar_url"):
+                previous_url = current.data[0].get("avatar_url")
+                acquire_images(AVATARS_BUCKET, update_data["avatar_url"])
+                acquired_url = update_data["avatar_url"]
 
-        response = supabase.table("users").update(update_data).eq("id", current_user.id).execute()
+        # Use admin client to bypass RLS
+        query = supabase_admin.table("users").update(update_data).eq("id", current_user.id)
+        if expected_version is not None:
+            query = query.eq("updated_at", expected_version)
+        response = query.execute()
 
         if not response.data:
+            release_images(AVATARS_BUCKET, acquired_url)
+            # Only the failure path reads: was the profile missing or changed?
+            if expected_version is not None:
+                exists = supabase_admin.table("users").select(USER_EXISTS_COLUMNS).eq("id", current_user.id).execute()
+                if exists.data and client_version is not None:
+                    raise precondition_failed("Profile")
+                if exists.data:
+                    # The profile changed between reading its avatar and updating it
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Profile was modified concurrently, please retry"
+                    )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
 
-        return response.data[0]
+        user_cache.invalidate(current_user.id)
+        profile_cache.invalidate(current_user.id)
+        read_router.mark_write(current_user.id)
+
+        if previous_url:
+            release_images(AVATARS_BUCKET, previous_url)
+            background_tasks.add_task(purge_released_images)
+
+        return user_rows.sign(response.data[0])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -61,21 +188,207 @@ async def update_current_user_profile(
         )
 
 
+@router.post("/me/avatar", response_model=User)
+async def upload_avatar(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Upload a new profile photo and set it as the current user's avatar.
+
+    Re-uploading an unchanged avatar reuses the stored image.
+    """
+    try:
+        stored = await store_image(file, AVATARS_BUCKET)
+
+        previous = supabase.table("users").select(USER_COLUMNS).eq("id", current_user.id).execute()
+        previous_url = previous.data[0].get("avatar_url") if previous.data else None
+
+        # Unchanged avatar: nothing to update
+        if previous_url == stored.url:
+            return user_rows.sign(previous.data[0])
+
+        acquire_images(AVATARS_BUCKET, stored.url)
+
+        # Use admin client to bypass RLS
+        response = (
+            supabase_admin.table("users")
+            .update({"avatar_url": stored.url})
+            .eq("id", current_user.id)
+            .execute()
+        )
+        user_cache.invalidate(current_user.id)
+        profile_cache.invalidate(current_user.id)
+
+        if not response.data:
+            release_images(AVATARS_BUCKET, stored.url)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+
+        read_router.mark_write(current_user.id)
+        release_images(AVATARS_BUCKET, previous_url)
+        background_tasks.add_task(purge_released_images)
+
+        return user_rows.sign(response.data[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not upload avatar: {str(e)}"
+        )
+
+
+@router.get("/me/export")
+async def export_current_user_data(
+    request: Request,
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Download all of the current user's posts, likes and invites as NDJSON.
+
+    Rows are streamed page by page (gzipped when the client accepts it),
+    so exports of any size use constant memory. Each line is
+    `{"type": "post" | "like" | "invite", "data": {...}}`, and the last
+    line is `{"type": "end", "count": N}`.
+    """
+    # Use admin client to bypass RLS; every source is filtered by owner
+    return export_response(
+        ndjson_export(supabase_admin, settings.export_page_size, user_id=current_user.id),
+        request.headers.get("accept-encoding", ""),
+        filename="postcard-export.ndjson",
+    )
+
+
+@router.post("/contacts/match", response_model=List[ContactMatch])
+async def match_contacts(
+    contact_request: ContactMatchRequest,
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Find which address book contacts are already registered.
+
+    Contacts can be plain email addresses or the hex SHA-256 of the
+    trimmed, lowercased address. Each match echoes the contact exactly as
+    it was sent, so the client can map it back to its address book entry.
+    """
+    if len(contact_request.contacts) > settings.contact_match_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many contacts. Maximum: {settings.contact_match_max}"
+        )
+
+    try:
+        hashes = {contact: contact_hash(contact) for contact in contact_request.contacts}
+        users = find_users_by_email_hash(hashes.values())
+        users = dict(zip(users, user_summary_rows.sign(users.values())))
+
+        matches = []
+        for contact, email_hash in hashes.items():
+            user = users.get(email_hash)
+            if user is not None and user["id"] != current_user.id:
+                matches.append({"contact": contact, "user": user_summary_rows.project(user)})
+
+        return matches
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not match contacts: {str(e)}"
+        )
+
+
+@router.post("/batch", response_model=UserBatch)
+async def get_users_batch(lookup: BatchLookup, request: Request):
+    """
+    Get several public user profiles by ID in one request.
+
+    `results` follows the order of `ids`, with null for users that do not
+    exist; their IDs are also listed in `missing`. Only public fields are
+    returned (no email), since the endpoint is unauthenticated.
+    """
+    user_ids = queryable_ids(lookup.ids)
+
+    try:
+        db = read_router.client(request_user_id(request))
+        users = get_or_fetch_many(user_cache, user_ids, lambda ids: _fetch_users(ids, db))
+
+        return user_summary_rows.batch_response(lookup.ids, users)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not fetch users: {str(e)}"
+        )
+
+
 @router.get("/{user_id}", response_model=User)
-async def get_user_by_id(user_id: str):
+async def get_user_by_id(user_id: str, request: Request):
     """Get user profile by ID."""
     try:
-        response = supabase.table("users").select("*").eq("id", user_id).execute()
+        # Pure read: served by a read replica when configured
+        db = read_router.client(request_user_id(request))
+        user = get_or_fetch_many(user_cache, [user_id], lambda ids: _fetch_users(ids, db)).get(user_id)
 
-        if not response.data:
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
 
-        return response.data[0]
+        return user_rows.conditional_response(request, user, USER_VERSION_FIELDS)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Could not fetch user: {str(e)}"
         )
+
+
+@router.post("/{user_id}/follow")
+async def follow(
+    user_id: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Follow a user. Their recent posts are added to the home feed."""
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot follow yourself"
+        )
+
+    try:
+        if not follow_user(current_user.id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already following this user"
+            )
+
+        user_cache.invalidate(user_id)
+
+        return {"message": "User followed successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not follow user: {str(e)}"
+        )
+
+
+@router.delete("/{user_id}/follow")
+async def unfollow(
+    user_id: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Unfollow a user. Their posts are removed from the home feed."""
+    try:
+        if unfollow_user(current_user.id, user_id):
+            user_cache.invalidate(user_id)
+
+        return {"message": "User unfollowed successfully"}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not unfollow user: {str(e)}"
+        )
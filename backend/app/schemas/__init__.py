@@ -1,16 +1,35 @@
 """Pydantic schemas for request/response validation."""
 
-from .user import User, UserCreate, UserUpdate
-from .post import Post, PostCreate, PostUpdate
+from .user import User, UserCreate, UserUpdate, UserSummary, ContactMatchRequest, ContactMatch
+from .post import Post, PostCreate, PostImport, PostImportReport, PostPage, PostUpdate, TagCount
 from .auth import Token, TokenData
+from .media import MediaUpload
+from .search import PostSearchResults, UserSearchResults
+from .batch import BatchLookup, PostBatch, UserBatch
+from .security_log import KeyCount, SecurityLogSummary
 
 __all__ = [
     "User",
     "UserCreate",
     "UserUpdate",
+    "UserSummary",
+    "ContactMatchRequest",
+    "ContactMatch",
     "Post",
     "PostCreate",
     "PostUpdate",
+    "PostImport",
+    "PostImportReport",
+    "PostPage",
+    "TagCount",
     "Token",
     "TokenData",
+    "MediaUpload",
+    "PostSearchResults",
+    "UserSearchResults",
+    "BatchLookup",
+    "PostBatch",
+    "UserBatch",
+    "KeyCount",
+    "SecurityLogSummary",
 ]
@@ -0,0 +1,24 @@
+"""Batch lookup schemas."""
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+from .post import Post
+from .user import UserSummary
+
+
+class BatchLookup(BaseModel):
+    """Request schema for fetching several rows by ID."""
+    ids: List[str]
+
+
+class PostBatch(BaseModel):
+    """Posts in the requested order, with None for IDs that were not found."""
+    results: List[Optional[Post]]
+    missing: List[str] = []
+
+
+class UserBatch(BaseModel):
+    """Public profiles in the requested order, with None for IDs that were not found."""
+    results: List[Optional[UserSummary]]
+    missing: List[str] = []
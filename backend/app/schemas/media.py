@@ -0,0 +1,16 @@
+"""Media upload schemas."""
+
+from pydantic import BaseModel
+from typing import Optional
+
+
+class MediaUpload(BaseModel):
+    """Response schema for an uploaded image."""
+    url: str
+    content_hash: str
+    content_type: str
+    size: int
+    deduplicated: bool = False
+    width: Optional[int] = None
+    height: Optional[int] = None
+    placeholder: Optional[str] = None
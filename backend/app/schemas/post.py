@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+from uuid import UUID
 
 
 class PostType(str, Enum):
@@ -25,6 +26,34 @@ class PostCreate(PostBase):
     pass
 
 
+class PostImport(PostCreate):
+    """One post in a bulk import, on behalf of any user."""
+    user_id: UUID
+    # Original publication time; defaults to the time of import
+    created_at: Optional[datetime] = None
+
+
+class PostImportError(BaseModel):
+    """A rejected line of a bulk import."""
+    line: int
+    error: str
+
+
+class PostImportReport(BaseModel):
+    """Outcome of a bulk import run."""
+    imported: int = 0
+    # Rows already present (e.g. re-sent after resuming)
+    duplicates: int = 0
+    failed: int = 0
+    # The first errors, up to IMPORT_MAX_ERRORS
+    errors: List[PostImportError] = []
+    # Every line up to here is done; pass as `resume_from` to continue
+    checkpoint: int = 0
+    completed: bool = False
+    # Why the run stopped early, if it did
+    aborted: Optional[str] = None
+
+
 class PostUpdate(BaseModel):
     """Schema for updating a post."""
     caption: Optional[str] = None
@@ -38,6 +67,23 @@ class Post(PostBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     likes_count: int = 0
+    # Computed at upload time so clients can lay out cards before the image loads
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    image_placeholder: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class PostPage(BaseModel):
+    """A page of posts with a cursor for the next page."""
+    results: List[Post]
+    # Pass back as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class TagCount(BaseModel):
+    """Number of posts using a tag."""
+    tag: str
+    post_count: int
@@ -0,0 +1,20 @@
+"""Search result schemas."""
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+from .post import Post
+from .user import UserSummary
+
+
+class PostSearchResults(BaseModel):
+    """A page of ranked post search results."""
+    results: List[Post]
+    # Pass back as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class UserSearchResults(BaseModel):
+    """A page of ranked user search results."""
+    results: List[UserSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,28 @@
+"""Security log summary schemas."""
+
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+class KeyCount(BaseModel):
+    """A value (IP address, path) and how often it was seen."""
+    key: str
+    count: int
+
+
+class SecurityLogSummary(BaseModel):
+    """Aggregated security log activity over a time window."""
+    since: str
+    hours: int
+    # Logged requests (3xx-5xx unless DEBUG logging is on)
+    requests: int
+    top_ips: List[KeyCount]
+    top_paths: List[KeyCount]
+    statuses: Dict[int, int]
+    # 401/403 responses on /api/auth/ endpoints
+    auth_failures_by_ip: List[KeyCount]
+    # Security warnings by kind (auth_failures, suspicious_path, ...)
+    events: Dict[str, int]
+    flagged_ips: List[KeyCount]
+    # Bytes of the log analyzed so far
+    log_offset: int
@@ -1,7 +1,7 @@
 """User schemas."""
 
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -37,3 +37,23 @@ class User(UserBase):
 
     class Config:
         from_attributes = True
+
+
+class UserSummary(BaseModel):
+    """Public profile fields shown in search results."""
+    id: str
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+
+class ContactMatchRequest(BaseModel):
+    """Address book contacts: email addresses or hex SHA-256 hashes of them."""
+    contacts: List[str]
+
+
+class ContactMatch(BaseModel):
+    """A contact that belongs to a registered user."""
+    contact: str
+    user: UserSummary
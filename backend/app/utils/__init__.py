@@ -1,5 +1,5 @@
 """Utility functions."""
 
-from .auth import get_current_user, verify_token
+from .auth import get_admin_user, get_current_user, verify_token
 
-__all__ = ["get_current_user", "verify_token"]
+__all__ = ["get_admin_user", "get_current_user", "verify_token"]
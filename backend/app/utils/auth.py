@@ -1,7 +1,10 @@
 """Authentication utilities."""
 
-from fastapi import Depends, HTTPException, status
+import base64
+import orjson
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.config import settings
 from app.database import supabase
 from typing import Optional, Dict
 
@@ -35,3 +38,34 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
 async def get_current_user(user: Dict = Depends(verify_token)) -> Dict:
     """Get current authenticated user."""
     return user
+
+
+async def get_admin_user(user: Dict = Depends(get_current_user)) -> Dict:
+    """Get current authenticated user, who must be listed in ADMIN_USER_IDS."""
+    if user.id not in settings.admin_user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user
+
+
+def request_user_id(request: Request) -> Optional[str]:
+    """
+    Read the user ID from a request's bearer token, without verifying it.
+
+    Only for routing decisions on public endpoints (e.g. keeping a user's
+    reads on the primary database after their own writes), never for
+    authorization. Returns None for anonymous or malformed requests.
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+
+    try:
+        payload = token.split(".")[1]
+        claims = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return claims.get("sub")
+    except Exception:
+        return None
@@ -0,0 +1,35 @@
+"""Validation for batch lookups by ID."""
+
+import uuid
+from typing import List
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+
+def queryable_ids(ids: List[str]) -> List[str]:
+    """
+    Check a batch request's size and pick the IDs worth querying.
+
+    Duplicates are dropped and malformed UUIDs are skipped (they can never
+    match, and would make the whole ``in`` query fail); both still get a
+    slot in the response.
+
+    Raises:
+        HTTPException: If more than ``settings.batch_max_ids`` IDs were sent
+    """
+    if len(ids) > settings.batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many IDs. Maximum: {settings.batch_max_ids}"
+        )
+
+    valid = []
+    for row_id in dict.fromkeys(ids):
+        try:
+            uuid.UUID(row_id)
+        except ValueError:
+            continue
+        valid.append(row_id)
+    return valid
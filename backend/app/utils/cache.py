@@ -0,0 +1,113 @@
+"""In-process TTL caches for hot database rows."""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+
+class TTLCache:
+    """
+    A bounded LRU cache whose entries expire after a fixed time-to-live.
+
+    Entries are kept in an ``OrderedDict`` in least-recently-used order, so
+    lookups, writes and evictions are all O(1). The cache is per process:
+    with several workers, a write only invalidates its own worker's copy
+    and other workers may serve the old row until it expires, so keep the
+    TTL short.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        """Return a cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, dict], List[Hashable]]:
+        """
+        Look up several keys at once.
+
+        Returns:
+            The cached values by key, and the keys that were not cached
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    def set(self, key: Hashable, value: dict):
+        """Cache a value, evicting the least recently used entry if full."""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop a cached value after the underlying row changed."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every cached value."""
+        self._entries.clear()
+
+
+def get_or_fetch_many(
+    cache: TTLCache,
+    ids: Iterable[str],
+    fetch: Callable[[List[str]], List[dict]],
+) -> Dict[str, dict]:
+    """
+    Resolve rows by id, reading through a cache.
+
+    Args:
+        cache: The cache of rows keyed by id
+        ids: Row ids, duplicates allowed
+        fetch: Loads the uncached ids in one query and returns their rows
+
+    Returns:
+        The rows that exist, keyed by id
+    """
+    found, missing = cache.get_many(dict.fromkeys(ids))
+    if missing:
+        for row in fetch(missing):
+            cache.set(row["id"], row)
+            found[row["id"]] = row
+    return found
+
+
+# Rows keyed by id, projected to POST_COLUMNS / USER_COLUMNS
+post_cache = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+user_cache = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+
+# The signed-in user's own profile (/api/users/me), keyed by user id. Only
+# its owner changes it, and their writes refresh it, so it can live longer.
+profile_cache = TTLCache(settings.cache_max_entries, settings.profile_cache_ttl_seconds)
@@ -0,0 +1,63 @@
+"""Matching address book contacts against registered users."""
+
+import hashlib
+import re
+from typing import Dict, Iterable, List
+
+from app.database import supabase
+from app.utils.projections import CONTACT_MATCH_COLUMNS
+
+# Hashes per IN (...) query, keeping each request URL well under server limits
+CONTACT_CHUNK_SIZE = 100
+
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def normalize_email(email: str) -> str:
+    """Normalize an email address the same way as users.email_normalized."""
+    return email.strip().lower()
+
+
+def hash_email(email: str) -> str:
+    """Hash an email address the same way as users.email_hash."""
+    return hashlib.sha256(normalize_email(email).encode()).hexdigest()
+
+
+def contact_hash(contact: str) -> str:
+    """
+    Turn a contact into the hash used for lookups.
+
+    Contacts may be sent as plain email addresses or as the hex SHA-256 of
+    the normalized address; plain addresses are hashed here.
+    """
+    contact = contact.strip().lower()
+    if _SHA256_HEX.match(contact):
+        return contact
+    return hash_email(contact)
+
+
+def find_users_by_email_hash(hashes: Iterable[str]) -> Dict[str, dict]:
+    """
+    Look up users by email hash, one indexed IN (...) query per chunk.
+
+    Args:
+        hashes: Email hashes, duplicates allowed
+
+    Returns:
+        Matching user rows keyed by email hash
+    """
+    unique: List[str] = list(dict.fromkeys(hashes))
+    matches = {}
+
+    for start in range(0, len(unique), CONTACT_CHUNK_SIZE):
+        chunk = unique[start:start + CONTACT_CHUNK_SIZE]
+        response = (
+            supabase.table("users")
+            .select(CONTACT_MATCH_COLUMNS)
+            .in_("email_hash", chunk)
+            .execute()
+        )
+        for row in response.data or []:
+            matches[row["email_hash"]] = row
+
+    return matches
@@ -1,14 +1,41 @@
 """Email utility for sending invites and notifications."""
 
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.resilience import UpstreamUnavailable, breakers
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _send_message(msg: MIMEMultipart):
+    """Deliver a message through the configured SMTP server."""
+    with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds) as server:
+        server.starttls()
+        server.login(settings.smtp_username, settings.smtp_password)
+        server.send_message(msg)
+
+
+def _is_smtp_outage(error: Exception) -> bool:
+    """
+    Whether an SMTP error means the server is unavailable.
+
+    Connection failures, timeouts and transient (4xx) replies count against
+    the SMTP breaker; permanent rejections such as a refused recipient are
+    about the message, not the server, and do not.
+    """
+    if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
 async def send_invite_email(to_email: str, from_user_name: str) -> bool:
     """
     Send an invite email to a friend.
@@ -19,6 +46,10 @@ async def send_invite_email(to_email: str, from_user_name: str) -> bool:
 
     Returns:
         bool: True if email sent successfully, False otherwise
+
+    Raises:
+        UpstreamUnavailable: If the SMTP server is down or its breaker is
+            open, so the route can answer 503 with Retry-After
     """
     if not settings.smtp_username or not settings.smtp_password or not settings.smtp_from_email:
         logger.warning("SMTP credentials not configured. Email not sent.")
@@ -132,15 +163,17 @@ Hope to see you there!
         msg.attach(part1)
         msg.attach(part2)
 
-        # Send email
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.starttls()
-            server.login(settings.smtp_username, settings.smtp_password)
-            server.send_message(msg)
+        # Send email in a thread (fails fast while the SMTP server is known to be down)
+        await asyncio.to_thread(breakers["smtp"].call, lambda: _send_message(msg), _is_smtp_outage)
 
         logger.info(f"Invite email sent successfully to {to_email}")
         return True
 
+    except UpstreamUnavailable:
+        logger.error(f"SMTP unavailable, invite email to {to_email} not sent")
+        raise
     except Exception as e:
         logger.error(f"Failed to send invite email to {to_email}: {str(e)}")
+        if _is_smtp_outage(e):
+            raise UpstreamUnavailable("smtp") from e
         return False
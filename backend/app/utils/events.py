@@ -0,0 +1,114 @@
+"""In-process fan-out of feed events to live (server-sent events) clients."""
+
+import asyncio
+from typing import AsyncIterator, Optional, Set
+
+import orjson
+
+from app.config import settings
+
+# Sent to a client whose queue overflowed: it missed events and must refetch
+RESYNC_EVENT = b"event: resync\ndata: {}\n\n"
+
+# SSE comment line, ignored by EventSource but keeps proxies from timing out
+HEARTBEAT = b": ping\n\n"
+
+
+def format_event(event: str, data: bytes) -> bytes:
+    """Encode a server-sent event with a JSON payload."""
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+class Subscription:
+    """A connected client's bounded queue of encoded events."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: bytes):
+        """Queue a message without blocking the publisher."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: discard its backlog and tell it to resync rather
+            # than letting one reader hold memory or slow down publishing
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+
+class FeedBroker:
+    """
+    Fan out feed events from the write routes to every connected client.
+
+    Each event is encoded once and pushed onto every subscriber's bounded
+    queue, so an idle feed costs one sleeping task per client and no
+    database queries. Events are published in-process: with several
+    workers, a client only sees writes handled by its own worker, so
+    clients should refetch on ``resync`` and on reconnect.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+
+    def subscribe(self) -> Subscription:
+        """Register a new client."""
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a client."""
+        self.subscribers.discard(subscription)
+
+    def publish(self, event: str, payload: Optional[dict] = None, data: Optional[bytes] = None):
+        """
+        Publish an event to all connected clients.
+
+        Args:
+            event: The event name (e.g. "post_created")
+            payload: JSON-serializable event data
+            data: Pre-encoded JSON data, used instead of ``payload``
+        """
+        if not self.subscribers:
+            return
+
+        if data is None:
+            data = orjson.dumps(payload or {}, option=orjson.OPT_UTC_Z)
+        message = format_event(event, data)
+
+        for subscription in list(self.subscribers):
+            subscription.offer(message)
+
+    async def stream(
+        self,
+        subscription: Subscription,
+        heartbeat_seconds: float,
+        is_disconnected,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield encoded events for one client until it disconnects.
+
+        Args:
+            subscription: The client's subscription
+            heartbeat_seconds: Idle interval after which a heartbeat is sent
+            is_disconnected: Async callable returning True once the client is gone
+        """
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        break
+                    message = HEARTBEAT
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+
+feed_events = FeedBroker(settings.feed_queue_size)
@@ -0,0 +1,133 @@
+"""Streaming NDJSON exports of posts, likes and invites."""
+
+import logging
+import zlib
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Sequence, Tuple
+
+import orjson
+from fastapi.responses import StreamingResponse
+from postgrest.exceptions import APIError
+
+from app.middleware.compression import GZIP_LEVEL, choose_encoding
+from app.utils.projections import INVITE_EXPORT_COLUMNS, LIKE_EXPORT_COLUMNS, POST_COLUMNS
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Undefined table (PostgreSQL) / table not in the schema cache (PostgREST)
+MISSING_TABLE_CODES = ("42P01", "PGRST205")
+
+# (record type, table, columns, owner column). Tables that do not exist
+# in a deployment (friend_invites is optional) are skipped.
+EXPORT_SOURCES: Sequence[Tuple[str, str, str, str]] = (
+    ("post", "posts", POST_COLUMNS, "user_id"),
+    ("like", "likes", LIKE_EXPORT_COLUMNS, "user_id"),
+    ("invite", "friend_invites", INVITE_EXPORT_COLUMNS, "inviter_id"),
+)
+
+
+def keyset_pages(
+    client: "Client",
+    table: str,
+    columns: str,
+    page_size: int,
+    owner: Optional[Tuple[str, str]] = None,
+) -> Iterator[list]:
+    """
+    Walk a table in primary key order, one page per query.
+
+    Each page continues after the last ``id`` of the previous one, so every
+    query is an index range scan no matter how deep the export is (unlike
+    ``offset``, which rescans all earlier rows).
+
+    Args:
+        client: Supabase client to read with
+        table: Table name; must have a UUID ``id`` primary key
+        columns: Columns to select
+        page_size: Rows per query
+        owner: Optional (column, user ID) filter
+    """
+    last_id = None
+    while True:
+        query = client.table(table).select(columns)
+        if owner is not None:
+            query = query.eq(*owner)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(page_size).execute().data or []
+
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def ndjson_export(client: "Client", page_size: int, user_id: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Yield an export as NDJSON, one chunk per page of rows.
+
+    Every line is ``{"type": ..., "data": row}``. The last line is
+    ``{"type": "end", "count": N}``, or ``{"type": "error", "error": ...,
+    "count": N}`` if the export failed part way (the response status is
+    already sent by then). A stream with neither was cut short.
+
+    Args:
+        client: Supabase client to read with
+        page_size: Rows per query
+        user_id: Export only this user's rows; all rows when None
+    """
+    count = 0
+    try:
+        for record_type, table, columns, owner_column in EXPORT_SOURCES:
+            owner = None if user_id is None else (owner_column, user_id)
+            try:
+                for rows in keyset_pages(client, table, columns, page_size, owner):
+                    count += len(rows)
+                    yield b"".join(
+                        orjson.dumps({"type": record_type, "data": row}) + b"\n" for row in rows
+                    )
+            except APIError as e:
+                if e.code not in MISSING_TABLE_CODES:
+                    raise
+                logger.info(f"Export skipped {table}: {e.message}")
+    except Exception as e:
+        logger.warning(f"Export failed after {count} records: {str(e)}")
+        yield orjson.dumps({"type": "error", "error": f"Export failed: {str(e)}", "count": count}) + b"\n"
+        return
+    yield orjson.dumps({"type": "end", "count": count}) + b"\n"
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a stream of chunks on the fly."""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(chunks: Iterable[bytes], accept_encoding: str, filename: str) -> StreamingResponse:
+    """
+    Stream an NDJSON export, gzipped when the client accepts it.
+
+    Memory stays flat: one page of rows is held at a time. The sync
+    iterator runs in the threadpool, so the blocking Supabase reads never
+    stall the event loop.
+    """
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",
+    }
+    if choose_encoding(accept_encoding, allow_brotli=False) == "gzip":
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE, headers=headers)
@@ -1,7 +1,7 @@
 """File validation utilities for secure file uploads."""
 
-from typing import Tuple
-import magic  # python-magic library for MIME type detection
+from functools import lru_cache
+from typing import Optional, Tuple
 from fastapi import UploadFile, HTTPException, status
 
 
@@ -14,6 +14,14 @@ ALLOWED_IMAGE_TYPES = {
     'image/webp'
 }
 
+# Leading bytes of each allowed format, checked when libmagic is missing
+_IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
 # Maximum file size (5MB)
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
 
@@ -62,24 +70,77 @@ def validate_image_file(file: UploadFile) -> Tuple[bool, str]:
         )
 
     # Validate MIME type using python-magic (more secure than trusting Content-Type header)
-    # Note: This requires libmagic to be installed
-    # For development without libmagic, you can check content_type from the header
+    detect_image_mime(file_content, file.content_type)
+
+    return True, ""
+
+
+@lru_cache(maxsize=1)
+def _magic_module():
+    """
+    Import python-magic on first use.
+
+    Loading libmagic is slow and only uploads need it, so it is not paid
+    at worker startup. Returns None when it is not installed.
+    """
     try:
-        mime = magic.from_buffer(file_content, mime=True)
-        if mime not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type. Detected: {mime}. Allowed: {', '.join(ALLOWED_IMAGE_TYPES)}"
-            )
+        import magic  # python-magic library for MIME type detection
+    except ImportError:  # libmagic is optional, see detect_image_mime
+        return None
+    return magic
+
+
+def sniff_image_mime(content: bytes) -> Optional[str]:
+    """Identify an allowed image format from its leading bytes, or None."""
+    for signature, mime in _IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return mime
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def detect_image_mime(content: bytes, declared_type: Optional[str]) -> str:
+    """
+    Detect and validate the MIME type of image content.
+
+    The type comes from the content itself: libmagic when it is installed,
+    otherwise the file signature. The client's Content-Type is never
+    trusted.
+
+    Args:
+        content: The file content (the first few KB are enough for detection)
+        declared_type: The Content-Type sent by the client, only reported
+            in the error
+
+    Returns:
+        The detected MIME type
+
+    Raises:
+        HTTPException: If the content is not an allowed image type
+    """
+    magic = _magic_module()
+    try:
+        mime = magic.from_buffer(content, mime=True)
     except Exception:
-        # Fallback to content_type if magic is not available
-        if file.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_IMAGE_TYPES)}"
+        mime = sniff_image_mime(content)
+
+    if mime is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"File is not a recognized image (declared as {declared_type}). "
+                f"Allowed: {', '.join(ALLOWED_IMAGE_TYPES)}"
             )
+        )
 
-    return True, ""
+    if mime not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Detected: {mime}. Allowed: {', '.join(ALLOWED_IMAGE_TYPES)}"
+        )
+
+    return mime
 
 
 def validate_image_url(url: str) -> bool:
@@ -0,0 +1,102 @@
+"""Materialized per-user home timelines (fan-out on write)."""
+
+import base64
+import logging
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.database import supabase_admin
+
+logger = logging.getLogger(__name__)
+
+
+def encode_feed_cursor(created_at: str, post_id: str) -> str:
+    """Encode the position after a feed entry as an opaque page cursor."""
+    raw = f"{created_at}|{post_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_feed_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a page cursor into its (created_at, post_id) position.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, post_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return created_at, post_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def fan_out_post(post_id: str, author_id: str, created_at: str):
+    """
+    Push a new post into its followers' home timelines.
+
+    Runs as a background task after the post is created. Authors with more
+    than ``settings.home_feed_fanout_max_followers`` followers are skipped
+    and merged into their followers' feeds at read time instead.
+    """
+    try:
+        response = supabase_admin.rpc("fan_out_post", {
+            "p_post_id": post_id,
+            "p_author_id": author_id,
+            "p_created_at": created_at,
+            "p_max_followers": settings.home_feed_fanout_max_followers,
+            "p_cap": settings.home_feed_timeline_length,
+        }).execute()
+        logger.info(f"Post {post_id} fanned out to {response.data} timelines")
+    except Exception as e:
+        logger.warning(f"Failed to fan out post {post_id}: {str(e)}")
+
+
+def home_feed_page(user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+    """
+    Read one page of post IDs from a user's home feed.
+
+    Args:
+        user_id: The reader
+        limit: Page size
+        cursor: ``next_cursor`` from the previous page
+
+    Returns:
+        Post IDs, newest first, and the cursor for the next page (None on
+        the last page)
+    """
+    params = {
+        "p_user_id": user_id,
+        "p_limit": limit,
+        "p_max_followers": settings.home_feed_fanout_max_followers,
+    }
+    if cursor:
+        params["p_before_created_at"], params["p_before_id"] = decode_feed_cursor(cursor)
+
+    entries = supabase_admin.rpc("home_feed_page", params).execute().data or []
+
+    next_cursor = None
+    if len(entries) == limit:
+        next_cursor = encode_feed_cursor(entries[-1]["created_at"], entries[-1]["post_id"])
+
+    return [entry["post_id"] for entry in entries], next_cursor
+
+
+def follow_user(follower_id: str, followee_id: str) -> bool:
+    """Follow a user and backfill their recent posts. Returns False if already following."""
+    response = supabase_admin.rpc("follow_user", {
+        "p_follower_id": follower_id,
+        "p_followee_id": followee_id,
+        "p_max_followers": settings.home_feed_fanout_max_followers,
+        "p_cap": settings.home_feed_timeline_length,
+    }).execute()
+    return bool(response.data)
+
+
+def unfollow_user(follower_id: str, followee_id: str) -> bool:
+    """Unfollow a user and drop their posts from the timeline. Returns False if not following."""
+    response = supabase_admin.rpc("unfollow_user", {
+        "p_follower_id": follower_id,
+        "p_followee_id": followee_id,
+    }).execute()
+    return bool(response.data)
@@ -0,0 +1,137 @@
+"""Idempotency-Key support for write routes that clients retry."""
+
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+T = TypeVar("T")
+
+# Longest Idempotency-Key header accepted
+MAX_KEY_LENGTH = 255
+
+# Set on responses that were replayed from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyStore:
+    """
+    Remember the result of a write by its idempotency key.
+
+    Completed results are kept in a bounded TTL cache, so a retried request
+    gets the original response back without running the write again.
+    While the original is still running, duplicates wait for it instead of
+    racing it. Only successful results are stored: if the original fails,
+    the key is released and the next attempt runs the write itself.
+
+    The store is per process, like the row caches.
+    """
+
+    def __init__(self, max_keys: int, ttl_seconds: float):
+        self._completed = TTLCache(max_keys, ttl_seconds)
+        self._inflight: Dict[Hashable, Tuple[str, asyncio.Future]] = {}
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    async def run(
+        self,
+        key: Hashable,
+        fingerprint: str,
+        fn: Callable[[], Awaitable[T]],
+    ) -> Tuple[T, bool]:
+        """
+        Run a write once per key.
+
+        Args:
+            key: The scoped idempotency key
+            fingerprint: Hash of the request payload; reusing a key with a
+                different payload is rejected
+            fn: Performs the write and returns the response value
+
+        Returns:
+            The response value, and whether it was replayed
+
+        Raises:
+            HTTPException: 422 if the key was used with a different payload
+        """
+        while True:
+            stored = self._completed.get(key)
+            if stored is not None:
+                self._check_fingerprint(stored["fingerprint"], fingerprint)
+                return stored["result"], True
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self._check_fingerprint(pending[0], fingerprint)
+            await asyncio.shield(pending[1])
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, done)
+        try:
+            result = await fn()
+            self._completed.set(key, {"fingerprint": fingerprint, "result": result})
+            return result, False
+        finally:
+            del self._inflight[key]
+            done.set_result(None)
+
+    @staticmethod
+    def _check_fingerprint(stored: str, fingerprint: str):
+        if stored != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+
+
+def payload_fingerprint(payload: BaseModel) -> str:
+    """Hash a request body so a reused key can be matched to its payload."""
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+async def idempotent(
+    idempotency_key: Optional[str],
+    scope: Tuple[str, ...],
+    payload: BaseModel,
+    response: Response,
+    fn: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Run a write route's body at most once per Idempotency-Key.
+
+    Without a key the write simply runs. Replayed responses carry the
+    ``Idempotent-Replayed: true`` header.
+
+    Args:
+        idempotency_key: The request's Idempotency-Key header, if any
+        scope: Route and user the key belongs to, so keys never collide
+            across users or endpoints
+        payload: The request body
+        response: The route's response, for the replay header
+        fn: The write itself
+    """
+    if idempotency_key is None:
+        return await fn()
+
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    result, replayed = await idempotency_store.run(
+        (*scope, idempotency_key), payload_fingerprint(payload), fn
+    )
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return result
+
+
+idempotency_store = IdempotencyStore(settings.idempotency_max_keys, settings.idempotency_ttl_seconds)
@@ -0,0 +1,103 @@
+"""Image metadata extracted once at upload time."""
+
+import base64
+import io
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Longest side of the inline placeholder, in pixels
+PLACEHOLDER_SIZE = 16
+
+# JPEG quality for the placeholder; it is blurred by the client anyway
+PLACEHOLDER_QUALITY = 40
+
+# EXIF orientations that rotate the image by 90 or 270 degrees
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+_EXIF_ORIENTATION = 0x0112
+
+
+@lru_cache(maxsize=1)
+def _pillow():
+    """
+    Import Pillow on first use, so only uploads pay for it.
+
+    Returns:
+        The (Image, ImageOps) modules, or None if Pillow is not installed
+    """
+    try:
+        from PIL import Image, ImageOps  # Pillow is optional, see requirements.txt
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+# Formats accepted for uploads (see file_validation.ALLOWED_IMAGE_TYPES)
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+
+
+class InvalidImageError(ValueError):
+    """The content does not decode as an allowed image format."""
+
+
+@dataclass
+class ImageMetadata:
+    """Display metadata for an image."""
+    width: int
+    height: int
+    placeholder: str
+
+
+def extract_image_metadata(content: bytes) -> Optional[ImageMetadata]:
+    """
+    Compute display dimensions and a tiny inline placeholder for an image.
+
+    The placeholder is a low-quality JPEG data URI (LQIP) a few hundred bytes
+    long, which clients can render blurred while the full image loads.
+
+    Args:
+        content: The raw image bytes
+
+    Returns:
+        The image metadata, or None if Pillow is unavailable
+
+    Raises:
+        InvalidImageError: If the content is not a decodable JPEG, PNG,
+            GIF or WebP image
+    """
+    pillow = _pillow()
+    if pillow is None:
+        return None
+    Image, ImageOps = pillow
+
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            if img.format not in ALLOWED_FORMATS:
+                raise InvalidImageError(f"Unsupported image format: {img.format}")
+            width, height = img.size
+            orientation = img.getexif().get(_EXIF_ORIENTATION)
+            if orientation in _TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+
+            # Let the JPEG decoder downscale while decoding
+            img.draft("RGB", (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+            thumb = ImageOps.exif_transpose(img).convert("RGB")
+            thumb.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+
+            buffer = io.BytesIO()
+            thumb.save(buffer, format="JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+    except InvalidImageError:
+        raise
+    except Exception as e:
+        logger.warning(f"Could not decode uploaded image: {str(e)}")
+        raise InvalidImageError(str(e)) from e
+
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return ImageMetadata(
+        width=width,
+        height=height,
+        placeholder=f"data:image/jpeg;base64,{encoded}",
+    )
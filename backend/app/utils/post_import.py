@@ -0,0 +1,253 @@
+"""Bulk post import with batched inserts and resumable checkpoints."""
+
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+import orjson
+from pydantic import ValidationError
+
+from app.config import settings
+from app.database import supabase_admin
+from app.resilience import find_upstream_failure
+from app.schemas.post import PostImport, PostImportError, PostImportReport
+from app.utils.storage import POSTS_BUCKET, acquire_images
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+# Imported post IDs are derived from their content, so a row that is sent
+# twice (e.g. after resuming) is recognized and skipped instead of duplicated
+IMPORT_ID_NAMESPACE = uuid.UUID("af6bf724-623c-4d6d-bdbb-c36d425d0657")
+
+# (line number, row to insert)
+NumberedRow = Tuple[int, dict]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of byte chunks (e.g. a request body) into lines."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def import_row(post: PostImport) -> dict:
+    """Build the posts row for a validated import line, with its content-derived ID."""
+    row = post.model_dump(mode="json")
+    row["id"] = str(uuid.uuid5(IMPORT_ID_NAMESPACE, orjson.dumps(row, option=orjson.OPT_SORT_KEYS).decode()))
+    if row["created_at"] is None:
+        row["created_at"] = datetime.now(timezone.utc).isoformat()
+    return row
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'line'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+class PostImporter:
+    """
+    Import a stream of NDJSON posts with batched, parallel inserts.
+
+    Each line is validated as a ``PostImport``; invalid lines are reported
+    and skipped. Valid rows are written ``batch_size`` at a time with one
+    multi-row insert, with at most ``max_parallel`` inserts in flight. When
+    a batch is rejected (e.g. one row names an unknown user) it is split in
+    half until the offending rows are isolated and reported, so one bad row
+    costs a few extra round trips rather than the whole batch.
+
+    The checkpoint is the last line before which everything is done, even
+    though batches finish out of order. Restarting with ``resume_from`` set
+    to it skips the finished lines; rows of batches that completed past
+    the checkpoint are re-sent and ignored as duplicates.
+
+    Imports are backfills: posts are not fanned out to home timelines or
+    published to the live feed, and the trending index picks them up on its
+    next rebuild.
+    """
+
+    def __init__(
+        self,
+        client: "Client" = supabase_admin,
+        batch_size: int = settings.import_batch_size,
+        max_parallel: int = settings.import_max_parallel,
+        max_errors: int = settings.import_max_errors,
+        resume_from: int = 0,
+        on_checkpoint: Optional[Callable[[int], None]] = None,
+    ):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_parallel = max_parallel
+        self.max_errors = max_errors
+        self.resume_from = resume_from
+        self.on_checkpoint = on_checkpoint
+        self.report = PostImportReport(checkpoint=resume_from)
+        self._inflight: Dict[asyncio.Task, int] = {}
+        # First lines of batches that failed to insert; the checkpoint stays before them
+        self._unfinished: List[int] = []
+        self._batch: List[NumberedRow] = []
+        self._last_line = resume_from
+
+    async def run(self, lines: AsyncIterable[Union[bytes, str]]) -> PostImportReport:
+        """
+        Import every line of an NDJSON stream.
+
+        Args:
+            lines: The stream, one post per line (blank lines are ignored)
+
+        Returns:
+            Counts, per-row errors and the checkpoint reached
+        """
+        slots = asyncio.Semaphore(self.max_parallel)
+        line_number = 0
+
+        try:
+            async for line in lines:
+                line_number += 1
+                if line_number <= self.resume_from:
+                    continue
+                self._last_line = line_number
+
+                if line.strip():
+                    self._add_line(line_number, line)
+                if len(self._batch) >= self.batch_size:
+                    await self._dispatch(slots)
+                if self.report.aborted:
+                    break
+
+            if self._batch and not self.report.aborted:
+                await self._dispatch(slots)
+        finally:
+            if self._inflight:
+                await asyncio.wait(list(self._inflight))
+
+        self.report.completed = self.report.aborted is None
+        self._advance_checkpoint()
+        return self.report
+
+    def _add_line(self, line_number: int, line: Union[bytes, str]):
+        try:
+            post = PostImport.model_validate(orjson.loads(line))
+        except orjson.JSONDecodeError as e:
+            self._record_errors([(line_number, f"Invalid JSON: {str(e)}")])
+            return
+        except ValidationError as e:
+            self._record_errors([(line_number, _validation_message(e))])
+            return
+        self._batch.append((line_number, import_row(post)))
+
+    async def _dispatch(self, slots: asyncio.Semaphore):
+        """Start inserting the current batch once an insert slot is free."""
+        batch, self._batch = self._batch, []
+        await slots.acquire()
+
+        task = asyncio.create_task(asyncio.to_thread(self._import_batch, batch))
+        self._inflight[task] = batch[0][0]
+
+        def finished(task: asyncio.Task):
+            slots.release()
+            del self._inflight[task]
+            self._batch_done(task, batch)
+
+        task.add_done_callback(finished)
+
+    def _batch_done(self, task: asyncio.Task, batch: List[NumberedRow]):
+        if task.cancelled() or task.exception() is not None:
+            # Stop, leaving the checkpoint before this batch so the import
+            # can be resumed once the database is back
+            self._unfinished.append(batch[0][0])
+            error = "cancelled" if task.cancelled() else str(task.exception())
+            logger.warning(f"Post import aborted: {error}")
+            self.report.aborted = f"Could not import posts: {error}"
+            return
+
+        inserted, failed = task.result()
+        self.report.imported += len(inserted)
+        self.report.duplicates += len(batch) - len(inserted) - len(failed)
+        self._record_errors(failed)
+        self._advance_checkpoint()
+
+    def _import_batch(self, rows: List[NumberedRow]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        """Insert one batch and update what depends on the new posts (runs in a thread)."""
+        inserted, failed = self._insert_rows(rows)
+        self._after_insert(inserted)
+        return inserted, failed
+
+    def _insert_rows(self, rows: List[NumberedRow]) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        """
+        Insert rows in one statement, bisecting to isolate rejected rows.
+
+        Returns:
+            The inserted rows, and (line, error) for each rejected row
+
+        Raises:
+            UpstreamUnavailable: If the database is down (not a row error)
+        """
+        try:
+            response = (
+                self.client.table("posts")
+                .upsert([row for _, row in rows], ignore_duplicates=True)
+                .execute()
+            )
+            return response.data or [], []
+        except Exception as e:
+            if find_upstream_failure(e) is not None:
+                raise
+            if len(rows) == 1:
+                return [], [(rows[0][0], str(e))]
+
+        middle = len(rows) // 2
+        first_inserted, first_failed = self._insert_rows(rows[:middle])
+        second_inserted, second_failed = self._insert_rows(rows[middle:])
+        return first_inserted + second_inserted, first_failed + second_failed
+
+    def _after_insert(self, inserted: List[dict]):
+        """Count tags and take image references for newly inserted posts."""
+        tags = Counter(tag for row in inserted for tag in set(row.get("tags") or []))
+        if tags:
+            try:
+                self.client.rpc("add_tag_counts", {
+                    "p_tags": list(tags.keys()),
+                    "p_counts": list(tags.values()),
+                }).execute()
+            except Exception as e:
+                logger.warning(f"Failed to update tag counts: {str(e)}")
+
+        # Posts imported from elsewhere usually link external images; only
+        # deduplicated uploads of our own need a reference
+        for row in inserted:
+            try:
+                acquire_images(POSTS_BUCKET, row.get("image_url"))
+            except Exception as e:
+                logger.warning(f"Failed to reference images of post {row['id']}: {str(e)}")
+
+    def _record_errors(self, errors: List[Tuple[int, str]]):
+        self.report.failed += len(errors)
+        room = self.max_errors - len(self.report.errors)
+        self.report.errors.extend(
+            PostImportError(line=line, error=error) for line, error in errors[:max(room, 0)]
+        )
+
+    def _advance_checkpoint(self):
+        """Move the checkpoint up to the first line that is not done yet."""
+        pending = list(self._inflight.values()) + self._unfinished
+        if self._batch:
+            pending.append(self._batch[0][0])
+        checkpoint = min(pending) - 1 if pending else self._last_line
+
+        if checkpoint > self.report.checkpoint:
+            self.report.checkpoint = checkpoint
+            if self.on_checkpoint is not None:
+                self.on_checkpoint(checkpoint)
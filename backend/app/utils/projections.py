@@ -0,0 +1,47 @@
+"""Column projections for Supabase queries.
+
+Queries select only the columns an endpoint actually returns or checks,
+instead of ``select("*")``, so payload size tracks the response schema
+rather than the table as it grows.
+"""
+
+from typing import Iterable, Type
+
+from pydantic import BaseModel
+
+from app.schemas.post import Post, TagCount
+from app.schemas.user import User, UserSummary
+
+
+def columns_for(model: Type[BaseModel], exclude: Iterable[str] = ()) -> str:
+    """
+    Build a PostgREST column list from a response schema's fields.
+
+    Args:
+        model: The response schema
+        exclude: Field names that are not table columns
+
+    Returns:
+        Comma-separated column names, in field order
+    """
+    excluded = set(exclude)
+    return ",".join(name for name in model.model_fields if name not in excluded)
+
+
+# Full response projections
+POST_COLUMNS = columns_for(Post)
+USER_COLUMNS = columns_for(User)
+TAG_COUNT_COLUMNS = columns_for(TagCount)
+USER_SUMMARY_COLUMNS = columns_for(UserSummary)
+
+# Minimal projections for internal checks
+POST_OWNER_COLUMNS = "user_id,tags,updated_at"
+POST_DELETE_COLUMNS = "user_id,image_url,tags"
+LIKE_EXISTS_COLUMNS = "post_id"
+USER_EXISTS_COLUMNS = "id"
+USER_DISPLAY_NAME_COLUMNS = "first_name,last_name,username"
+CONTACT_MATCH_COLUMNS = f"{USER_SUMMARY_COLUMNS},email_hash"
+
+# Data export projections
+LIKE_EXPORT_COLUMNS = "id,post_id,user_id,created_at"
+INVITE_EXPORT_COLUMNS = "id,inviter_id,invitee_email,created_at"
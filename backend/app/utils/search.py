@@ -0,0 +1,46 @@
+"""Helpers for ranked, keyset-paginated search."""
+
+import base64
+from typing import List, Optional, Tuple
+
+# Longest query accepted; longer input is truncated
+MAX_QUERY_LENGTH = 100
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and cap the length of a search query."""
+    return " ".join(query.split())[:MAX_QUERY_LENGTH]
+
+
+def encode_cursor(rank: float, row_id: str) -> str:
+    """
+    Encode the position after a result as an opaque page cursor.
+
+    ``repr`` keeps the full float precision, so the next page starts
+    exactly after this row even when several rows share a rank.
+    """
+    raw = f"{rank!r}:{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a page cursor into its (rank, id) position.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, row_id = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        return float(rank), row_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def next_cursor(rows: List[dict], limit: int) -> Optional[str]:
+    """Return the cursor after the last row, or None if this was the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last["rank"], last["id"])
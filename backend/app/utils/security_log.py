@@ -0,0 +1,301 @@
+"""Incremental analysis of the security log (logs/security.log)."""
+
+import mmap
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import orjson
+
+# Only lines from the "security" logger are analyzed; the file also holds
+# every other logger's output (httpx, app modules)
+SECURITY_MARKER = b" - security - "
+
+# "2026-01-31 14:05:09,123 - security - WARNING - message"; hours are the
+# first 13 characters of the timestamp, which sort chronologically
+_LINE_RE = re.compile(
+    rb"^(?P<hour>\d{4}-\d\d-\d\d \d\d):\d\d:\d\d,\d+ - security - (?P<level>[A-Z]+) - (?P<message>.*)$"
+)
+
+# Request logs are "<kind>: {dict repr}" written by SecurityMonitoringMiddleware
+_REQUEST_PREFIXES = (b"Server error: {", b"Client error: {", b"Redirect: {", b"Success: {")
+_STRING = rb"(?:'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\")"
+_PATH_RE = re.compile(rb"'path': " + _STRING)
+_CLIENT_IP_RE = re.compile(rb"'client_ip': " + _STRING)
+_STATUS_RE = re.compile(rb"'status_code': (\d+)")
+
+# Security warnings are "<description> from IP: <ip>, ..."
+_EVENT_IP_RE = re.compile(rb"^(?P<event>.+?) from IP: (?P<ip>[^,\s]+)")
+EVENT_NAMES = {
+    b"Multiple failed authentication attempts": "auth_failures",
+    b"Suspicious path access": "suspicious_path",
+    b"Suspicious user agent": "suspicious_agent",
+    b"Potential SQL injection attempt": "sql_injection",
+    b"High request rate detected": "high_request_rate",
+}
+
+# Path segments that are IDs, collapsed so paths aggregate per route
+_ID_SEGMENT_RE = re.compile(r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|[0-9a-fA-F]{32}|\d+)(?=/|$)")
+
+AUTH_FAILURE_STATUSES = (401, 403)
+
+
+class LogRecord(NamedTuple):
+    """One parsed security log line."""
+    hour: str
+    client_ip: Optional[str]
+    path: Optional[str]
+    status_code: Optional[int]
+    event: Optional[str]
+
+
+def _string_value(match: Optional[re.Match]) -> Optional[str]:
+    if match is None:
+        return None
+    value = match.group(1) if match.group(1) is not None else match.group(2)
+    return value.decode("utf-8", "replace")
+
+
+def normalize_path(path: str) -> str:
+    """Collapse ID segments: ``/api/posts/3f2a.../like`` -> ``/api/posts/{id}/like``."""
+    return _ID_SEGMENT_RE.sub("/{id}", path)
+
+
+def parse_line(line: bytes) -> Optional[LogRecord]:
+    """
+    Parse a security log line.
+
+    Returns:
+        The record, or None for lines that are neither a request log nor
+        a security warning
+    """
+    match = _LINE_RE.match(line)
+    if match is None:
+        return None
+
+    hour = match.group("hour").decode()
+    message = match.group("message")
+
+    if message.startswith(_REQUEST_PREFIXES):
+        status = _STATUS_RE.search(message)
+        path = _string_value(_PATH_RE.search(message))
+        return LogRecord(
+            hour=hour,
+            client_ip=_string_value(_CLIENT_IP_RE.search(message)),
+            path=normalize_path(path) if path is not None else None,
+            status_code=int(status.group(1)) if status else None,
+            event=None,
+        )
+
+    event = _EVENT_IP_RE.match(message)
+    if event is not None:
+        name = EVENT_NAMES.get(event.group("event"))
+        if name is None:
+            name = re.sub(r"[^a-z0-9]+", "_", event.group("event").decode("utf-8", "replace").lower()).strip("_")
+        return LogRecord(hour=hour, client_ip=event.group("ip").decode(), path=None, status_code=None, event=name)
+
+    return None
+
+
+def scan_security_lines(mm: mmap.mmap, start: int) -> Iterator[bytes]:
+    """
+    Yield the complete security logger lines of a mapped log from ``start``.
+
+    Searches for the logger marker instead of splitting every line, so the
+    (much more numerous) lines of other loggers are skipped at C speed.
+    A trailing line without a newline is still being written and is left
+    for the next scan.
+    """
+    position = start
+    while True:
+        hit = mm.find(SECURITY_MARKER, position)
+        if hit == -1:
+            return
+        line_start = mm.rfind(b"\n", position, hit) + 1 or position
+        line_end = mm.find(b"\n", hit)
+        if line_end == -1:
+            return
+        yield mm[line_start:line_end]
+        position = line_end + 1
+
+
+def _new_bucket() -> Dict:
+    return {
+        "requests": 0,
+        "ip": Counter(),
+        "path": Counter(),
+        "status": Counter(),
+        "auth_failure_ip": Counter(),
+        "event": Counter(),
+        "flagged_ip": Counter(),
+    }
+
+
+class SecurityLogAnalyzer:
+    """
+    Rolling aggregates over the security log, updated incrementally.
+
+    Counts of logged requests by client IP, path and status, auth failures
+    by IP, and security warnings are kept per hour. Each refresh maps the
+    file and parses only the bytes appended since the previous one, so a
+    query never re-reads history. The byte offset and the hourly buckets
+    are saved to ``state_path``, so restarts (and repeated CLI runs) pick
+    up where the last one stopped. A log that shrank or was replaced
+    (rotation) is read again from its start.
+
+    Note that successful requests are logged at DEBUG level and therefore
+    only counted when the log level includes them.
+    """
+
+    def __init__(self, log_path: Path, retention_hours: int, state_path: Optional[Path] = None):
+        self.log_path = Path(log_path)
+        self.retention_hours = retention_hours
+        self.state_path = state_path
+        self.offset = 0
+        self.inode: Optional[int] = None
+        self.buckets: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._load_state()
+
+    def refresh(self) -> int:
+        """
+        Parse the lines appended since the last refresh.
+
+        Returns:
+            Number of security lines parsed
+        """
+        with self._lock:
+            try:
+                log = self.log_path.open("rb")
+            except FileNotFoundError:
+                return 0
+
+            with log:
+                stat = os.fstat(log.fileno())
+                if stat.st_ino != self.inode or stat.st_size < self.offset:
+                    self.inode = stat.st_ino
+                    self.offset = 0
+                if stat.st_size == self.offset:
+                    return 0
+
+                parsed = 0
+                with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for line in scan_security_lines(mm, self.offset):
+                        record = parse_line(line)
+                        if record is not None:
+                            self._add(record)
+                            parsed += 1
+                    self.offset = mm.rfind(b"\n", self.offset) + 1 or self.offset
+
+            self._prune()
+            self._save_state()
+            return parsed
+
+    def summary(self, hours: int = 24, top: int = 20) -> Dict:
+        """
+        Merge the hourly buckets of the last ``hours`` hours.
+
+        Args:
+            hours: Window size, counted back from now
+            top: How many IPs and paths to list
+        """
+        since = (datetime.now() - timedelta(hours=hours - 1)).strftime("%Y-%m-%d %H")
+        merged = _new_bucket()
+        with self._lock:
+            for hour, bucket in self.buckets.items():
+                if hour >= since:
+                    merged["requests"] += bucket["requests"]
+                    for key in ("ip", "path", "status", "auth_failure_ip", "event", "flagged_ip"):
+                        merged[key].update(bucket[key])
+            offset = self.offset
+
+        return {
+            "since": f"{since}:00",
+            "hours": hours,
+            "requests": merged["requests"],
+            "top_ips": _top(merged["ip"], top),
+            "top_paths": _top(merged["path"], top),
+            "statuses": {int(status): count for status, count in sorted(merged["status"].items())},
+            "auth_failures_by_ip": _top(merged["auth_failure_ip"], top),
+            "events": dict(merged["event"].most_common()),
+            "flagged_ips": _top(merged["flagged_ip"], top),
+            "log_offset": offset,
+        }
+
+    def query(self, hours: int = 24, top: int = 20) -> Dict:
+        """Refresh, then summarize."""
+        self.refresh()
+        return self.summary(hours, top)
+
+    def _add(self, record: LogRecord):
+        bucket = self.buckets.get(record.hour)
+        if bucket is None:
+            bucket = self.buckets[record.hour] = _new_bucket()
+
+        if record.event is not None:
+            bucket["event"][record.event] += 1
+            bucket["flagged_ip"][record.client_ip] += 1
+            return
+
+        bucket["requests"] += 1
+        if record.client_ip is not None:
+            bucket["ip"][record.client_ip] += 1
+        if record.path is not None:
+            bucket["path"][record.path] += 1
+        if record.status_code is not None:
+            bucket["status"][str(record.status_code)] += 1
+            if (
+                record.status_code in AUTH_FAILURE_STATUSES
+                and record.client_ip is not None
+                and (record.path or "").startswith("/api/auth/")
+            ):
+                bucket["auth_failure_ip"][record.client_ip] += 1
+
+    def _prune(self):
+        """Drop buckets older than the retention window."""
+        cutoff = (datetime.now() - timedelta(hours=self.retention_hours)).strftime("%Y-%m-%d %H")
+        for hour in [hour for hour in self.buckets if hour < cutoff]:
+            del self.buckets[hour]
+
+    def _load_state(self):
+        if self.state_path is None:
+            return
+        try:
+            state = orjson.loads(self.state_path.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return
+
+        self.offset = state["offset"]
+        self.inode = state["inode"]
+        self.buckets = {
+            hour: {
+                key: value if key == "requests" else Counter(value)
+                for key, value in bucket.items()
+            }
+            for hour, bucket in state["buckets"].items()
+        }
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        # Write then rename, so a crash never leaves a half-written state
+        partial = self.state_path.with_name(self.state_path.name + ".tmp")
+        partial.write_bytes(orjson.dumps({
+            "offset": self.offset,
+            "inode": self.inode,
+            "buckets": self.buckets,
+        }))
+        os.replace(partial, self.state_path)
+
+
+def _top(counter: Counter, limit: int) -> List[Dict]:
+    return [{"key": key, "count": count} for key, count in counter.most_common(limit)]
+
+
+def default_state_path(log_path: Path) -> Path:
+    """Where the analyzer state for a log is kept: next to the log."""
+    return log_path.with_name(log_path.name + ".state.json")
@@ -0,0 +1,175 @@
+"""Signed URLs for media in private storage buckets.
+
+Stored rows keep the canonical object URL (``/object/public/<bucket>/<path>``,
+as returned by ``store_image``). When a bucket is listed in
+``PRIVATE_MEDIA_BUCKETS`` that URL is not readable, so responses swap it for
+a signed one. Signed URLs are cached by object and reused until shortly
+before they expire, and the misses of a whole page are signed with one
+Storage API call per bucket.
+"""
+
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import unquote
+
+from app.config import settings
+from app.database import supabase_admin
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Public and signed object URLs of our storage
+_OBJECT_URL_RE = re.compile(
+    r"^(?P<base>.*/storage/v1/object)/(?:public|sign)/(?P<bucket>[^/?]+)/(?P<path>[^?#]+)"
+)
+
+# (bucket, object path)
+StorageObject = Tuple[str, str]
+
+
+def storage_object(url: str) -> Optional[StorageObject]:
+    """Return the (bucket, path) a storage URL points to, or None for other URLs."""
+    match = _OBJECT_URL_RE.match(url.strip())
+    if match is None:
+        return None
+    return match.group("bucket"), unquote(match.group("path"))
+
+
+def canonical_media_url(value: Optional[str]) -> Optional[str]:
+    """
+    Turn signed URLs back into the canonical public-form URLs rows store.
+
+    Clients may send back a URL they got in a response (e.g. an unchanged
+    avatar on a profile edit); storing the signed form would break once it
+    expires. ``value`` may hold several comma-separated URLs.
+    """
+    if not value:
+        return value
+
+    urls = []
+    for url in value.split(','):
+        match = _OBJECT_URL_RE.match(url.strip())
+        if match is None:
+            urls.append(url)
+        else:
+            urls.append(f"{match.group('base')}/public/{match.group('bucket')}/{match.group('path')}")
+    return ",".join(urls)
+
+
+class SignedUrlCache:
+    """
+    Signed URLs keyed by (bucket, path).
+
+    Entries are kept for the URL's lifetime minus ``refresh_margin``, so a
+    cached URL always has at least that long left when it is handed out;
+    after that the object is signed again. Like the row caches, the cache
+    is per process.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, refresh_margin_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._urls = TTLCache(max_entries, max(ttl_seconds - refresh_margin_seconds, 0))
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def sign(self, bucket: str, paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Signed URLs for objects of one bucket, signing the uncached ones in one call.
+
+        Returns:
+            Signed URL by path; paths the Storage API could not sign (e.g.
+            missing objects) are left out
+        """
+        found, missing = self._urls.get_many((bucket, path) for path in dict.fromkeys(paths))
+        signed = {path: url for (_, path), url in found.items()}
+        if not missing:
+            return signed
+
+        # The Storage API is called directly: storage3's create_signed_urls
+        # fails the whole batch when any object (e.g. a purged one) has no URL
+        session = supabase_admin.storage.session
+        response = session.post(
+            f"/object/sign/{bucket}",
+            json={"paths": [path for _, path in missing], "expiresIn": self.ttl_seconds},
+        )
+        response.raise_for_status()
+        for item in response.json():
+            if item.get("error") or not item.get("signedURL"):
+                logger.warning(f"Could not sign {bucket}/{item.get('path')}: {item.get('error')}")
+                continue
+            url = f"{session.base_url}{item['signedURL'].lstrip('/')}"
+            self._urls.set((bucket, item["path"]), url)
+            signed[item["path"]] = url
+        return signed
+
+
+def _private_objects(value: Optional[str]) -> List[StorageObject]:
+    if not value:
+        return []
+    objects = (storage_object(url) for url in value.split(','))
+    return [obj for obj in objects if obj is not None and obj[0] in settings.private_media_buckets]
+
+
+def sign_media_rows(
+    rows: Union[dict, Sequence[dict]],
+    fields: Sequence[str],
+) -> Union[dict, List[dict]]:
+    """
+    Replace private media URLs in rows with signed URLs.
+
+    Rows are copied, never modified, since they may be shared with the row
+    caches. URLs of public buckets and external URLs are left as they are.
+    If signing fails, the rows keep their stored URLs and the failure is
+    logged, so a Storage outage does not fail the whole response.
+
+    Args:
+        rows: A row, or a list of rows
+        fields: Columns holding media URLs (comma-separated lists allowed)
+
+    Returns:
+        The row, or rows, with signed URLs
+    """
+    if not settings.private_media_buckets:
+        return rows
+
+    many = not isinstance(rows, dict)
+    rows = list(rows) if many else [rows]
+
+    paths_by_bucket: Dict[str, List[str]] = {}
+    for row in rows:
+        for field in fields:
+            for bucket, path in _private_objects(row.get(field)):
+                paths_by_bucket.setdefault(bucket, []).append(path)
+
+    signed: Dict[StorageObject, str] = {}
+    for bucket, paths in paths_by_bucket.items():
+        try:
+            signed.update(
+                ((bucket, path), url) for path, url in signed_url_cache.sign(bucket, paths).items()
+            )
+        except Exception as e:
+            logger.warning(f"Failed to sign media URLs in {bucket}: {str(e)}")
+
+    if signed:
+        rows = [_with_signed_urls(row, fields, signed) for row in rows]
+    return rows if many else rows[0]
+
+
+def _with_signed_urls(row: dict, fields: Sequence[str], signed: Dict[StorageObject, str]) -> dict:
+    replaced = {}
+    for field in fields:
+        value = row.get(field)
+        if value:
+            replaced[field] = ",".join(
+                signed.get(storage_object(url), url) for url in value.split(',')
+            )
+    return {**row, **replaced} if replaced else row
+
+
+signed_url_cache = SignedUrlCache(
+    settings.signed_url_cache_max_entries,
+    settings.signed_url_ttl_seconds,
+    settings.signed_url_refresh_margin_seconds,
+)
@@ -0,0 +1,315 @@
+"""Content-addressed image storage with deduplication.
+
+Uploaded images are stored under a path derived from the SHA-256 of their
+content, so re-uploading the same photo or avatar reuses the existing object
+instead of storing another copy. Each blob is tracked in the ``media_blobs``
+table (see ``SETUP_MEDIA_DEDUP.sql``) with a reference count; blobs that are
+no longer referenced are purged after a grace period.
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.config import settings
+from app.database import supabase_admin
+from app.utils.file_validation import (
+    MAX_FILE_SIZE,
+    detect_image_mime,
+    sanitize_filename,
+)
+from app.utils.images import InvalidImageError, extract_image_metadata
+from postgrest.types import ReturnMethod
+
+logger = logging.getLogger(__name__)
+
+POSTS_BUCKET = "posts"
+AVATARS_BUCKET = "avatars"
+
+# Read uploads in 64KB chunks so hashing overlaps with the upload stream
+CHUNK_SIZE = 64 * 1024
+
+# Bytes needed by libmagic to detect the image type
+MIME_SNIFF_SIZE = 2048
+
+MIME_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+_BLOB_PATH_RE = re.compile(r"/object/public/(?P<bucket>[^/]+)/blobs/(?P<hash>[0-9a-f]{64})\.")
+
+
+@dataclass
+class StoredImage:
+    """Result of storing an uploaded image."""
+    url: str
+    path: str
+    content_hash: str
+    content_type: str
+    size: int
+    deduplicated: bool
+    width: Optional[int] = None
+    height: Optional[int] = None
+    placeholder: Optional[str] = None
+
+
+async def read_and_hash_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """
+    Read an upload in chunks, hashing and size-checking it as it streams in.
+
+    Args:
+        file: The uploaded file
+
+    Returns:
+        Tuple of (content, sha256_hexdigest)
+
+    Raises:
+        HTTPException: If the file is larger than MAX_FILE_SIZE
+    """
+    hasher = hashlib.sha256()
+    chunks = []
+    size = 0
+
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+
+        size += len(chunk)
+        if size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024)}MB"
+            )
+
+        hasher.update(chunk)
+        chunks.append(chunk)
+
+    if size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded file is empty"
+        )
+
+    return b"".join(chunks), hasher.hexdigest()
+
+
+def blob_path(content_hash: str, content_type: str) -> str:
+    """Return the storage path for a blob with the given content hash."""
+    return f"blobs/{content_hash}.{MIME_EXTENSIONS[content_type]}"
+
+
+async def store_image(file: UploadFile, bucket: str) -> StoredImage:
+    """
+    Validate and store an uploaded image, reusing an identical existing blob.
+
+    The blob is registered with a reference count of zero; callers that keep
+    the returned URL (a post or an avatar) must call ``acquire_images`` so the
+    blob is not purged.
+
+    Args:
+        file: The uploaded image
+        bucket: Storage bucket to store the image in
+
+    Returns:
+        The stored image, with ``deduplicated`` set if no upload was needed
+    """
+    if not file.filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filename is required"
+        )
+
+    file_ext = sanitize_filename(file.filename).split('.')[-1].lower()
+    if file_ext not in {'jpg', 'jpeg', 'png', 'gif', 'webp'}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file extension. Allowed: jpg, jpeg, png, gif, webp"
+        )
+
+    content, content_hash = await read_and_hash_upload(file)
+    content_type = detect_image_mime(content[:MIME_SNIFF_SIZE], file.content_type)
+    path = blob_path(content_hash, content_type)
+    try:
+        metadata = extract_image_metadata(content)
+    except InvalidImageError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File could not be read as an image"
+        )
+
+    # Registration is atomic on (bucket, content_hash): only the first
+    # uploader of a given blob gets True back and has to upload it.
+    registered = supabase_admin.rpc("register_media_blob", {
+        "p_bucket": bucket,
+        "p_hash": content_hash,
+        "p_path": path,
+        "p_content_type": content_type,
+        "p_size": len(content),
+        "p_width": metadata.width if metadata else None,
+        "p_height": metadata.height if metadata else None,
+        "p_placeholder": metadata.placeholder if metadata else None,
+    }).execute()
+    is_new = bool(registered.data)
+
+    if is_new:
+        try:
+            supabase_admin.storage.from_(bucket).upload(
+                path,
+                content,
+                {"content-type": content_type, "cache-control": "31536000", "upsert": "true"}
+            )
+        except Exception:
+            # Drop the registration so the next upload of this content retries
+            supabase_admin.table("media_blobs").delete(returning=ReturnMethod.minimal).eq("bucket", bucket).eq(
+                "content_hash", content_hash
+            ).eq("ref_count", 0).execute()
+            raise
+
+    url = supabase_admin.storage.from_(bucket).get_public_url(path)
+
+    return StoredImage(
+        url=url.rstrip("?"),
+        path=path,
+        content_hash=content_hash,
+        content_type=content_type,
+        size=len(content),
+        deduplicated=not is_new,
+        width=metadata.width if metadata else None,
+        height=metadata.height if metadata else None,
+        placeholder=metadata.placeholder if metadata else None,
+    )
+
+
+def blob_hashes(bucket: str, image_url: Optional[str]) -> List[str]:
+    """
+    Extract the content hashes of deduplicated blobs referenced by an image URL.
+
+    ``image_url`` may hold several comma-separated URLs (story posts). URLs
+    that were not stored through ``store_image`` are ignored.
+    """
+    if not image_url:
+        return []
+
+    hashes = []
+    for url in image_url.split(','):
+        match = _BLOB_PATH_RE.search(url.strip())
+        if match and match.group("bucket") == bucket and match.group("hash") not in hashes:
+            hashes.append(match.group("hash"))
+    return hashes
+
+
+def acquire_images(bucket: str, image_url: Optional[str]) -> Dict[str, dict]:
+    """
+    Take a reference on every deduplicated blob in ``image_url``.
+
+    Returns:
+        The stored width, height and placeholder of each acquired blob,
+        keyed by content hash
+
+    Raises:
+        HTTPException: 409 if a blob is no longer registered (it was purged
+            after being unreferenced); no references are kept in that case
+    """
+    hashes = blob_hashes(bucket, image_url)
+    if not hashes:
+        return {}
+
+    response = supabase_admin.rpc("acquire_media_blobs", {
+        "p_bucket": bucket,
+        "p_hashes": hashes,
+    }).execute()
+
+    acquired = {row["content_hash"]: row for row in response.data or []}
+    if len(acquired) < len(hashes):
+        # Do not point a post or profile at a deleted object
+        if acquired:
+            supabase_admin.rpc("release_media_blobs", {
+                "p_bucket": bucket,
+                "p_hashes": list(acquired),
+            }).execute()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Image is no longer available; upload it again"
+        )
+
+    return acquired
+
+
+def cover_image_fields(bucket: str, image_url: Optional[str], acquired: Dict[str, dict]) -> dict:
+    """
+    Build the post image columns from the first image's stored metadata.
+
+    Args:
+        bucket: Storage bucket of the images
+        image_url: The post's image URL(s)
+        acquired: Result of ``acquire_images`` for the same URL(s)
+
+    Returns:
+        Dict of image_width, image_height and image_placeholder, empty if the
+        first image has no stored metadata
+    """
+    first_url = image_url.split(',')[0] if image_url else None
+    hashes = blob_hashes(bucket, first_url)
+    if not hashes:
+        return {}
+
+    row = acquired.get(hashes[0])
+    if not row or row.get("width") is None:
+        return {}
+
+    return {
+        "image_width": row["width"],
+        "image_height": row["height"],
+        "image_placeholder": row.get("placeholder"),
+    }
+
+
+def release_images(bucket: str, image_url: Optional[str]) -> None:
+    """Drop a reference on every deduplicated blob in ``image_url``."""
+    hashes = blob_hashes(bucket, image_url)
+    if hashes:
+        supabase_admin.rpc("release_media_blobs", {
+            "p_bucket": bucket,
+            "p_hashes": hashes,
+        }).execute()
+
+
+def purge_released_images() -> int:
+    """
+    Delete blobs that have been unreferenced for longer than the grace period.
+
+    Safe to call from a background task; failures are logged, not raised.
+
+    Returns:
+        Number of objects removed from storage
+    """
+    try:
+        response = supabase_admin.rpc("purge_released_media_blobs", {
+            "p_grace_seconds": settings.media_orphan_grace_seconds,
+        }).execute()
+    except Exception as e:
+        logger.warning(f"Failed to purge released media: {str(e)}")
+        return 0
+
+    paths_by_bucket = {}
+    for row in response.data or []:
+        paths_by_bucket.setdefault(row["bucket"], []).append(row["path"])
+
+    removed = 0
+    for bucket, paths in paths_by_bucket.items():
+        try:
+            supabase_admin.storage.from_(bucket).remove(paths)
+            removed += len(paths)
+        except Exception as e:
+            logger.warning(f"Failed to remove released media from {bucket}: {str(e)}")
+
+    return removed
@@ -0,0 +1,59 @@
+"""Tag filtering and incrementally maintained tag counts."""
+
+import logging
+from typing import Iterable, List, Optional
+
+from app.database import supabase_admin
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of tags accepted in a single feed filter
+MAX_FILTER_TAGS = 10
+
+
+def array_values(tags: Iterable[str]) -> List[str]:
+    """
+    Quote tags for a PostgREST array filter (``cs``/``ov``).
+
+    Quoting keeps tags containing commas, braces or spaces intact.
+    """
+    quoted = []
+    for tag in tags:
+        escaped = tag.replace('\\', '\\\\').replace('"', '\\"')
+        quoted.append(f'"{escaped}"')
+    return quoted
+
+
+def normalize_filter_tags(tags: Optional[List[str]]) -> List[str]:
+    """Strip, de-duplicate and drop empty tags from a feed filter."""
+    normalized = []
+    for tag in tags or []:
+        tag = tag.strip()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+def adjust_tag_counts(old_tags: Optional[Iterable[str]], new_tags: Optional[Iterable[str]]):
+    """
+    Update the tag -> post count index for a post whose tags changed.
+
+    Pass ``old_tags=None`` for a new post and ``new_tags=None`` for a deleted
+    one. Failures are logged rather than failing the write; the counts can
+    be rebuilt with SETUP_TAG_INDEX.sql.
+    """
+    old = set(old_tags or [])
+    new = set(new_tags or [])
+    added = sorted(new - old)
+    removed = sorted(old - new)
+
+    if not added and not removed:
+        return
+
+    try:
+        supabase_admin.rpc("adjust_tag_counts", {
+            "p_added": added,
+            "p_removed": removed,
+        }).execute()
+    except Exception as e:
+        logger.warning(f"Failed to update tag counts: {str(e)}")
@@ -0,0 +1,167 @@
+"""In-memory trending index with incremental time-decay scoring."""
+
+import asyncio
+import bisect
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.database import supabase
+from app.utils.projections import POST_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value) -> float:
+    """Convert a created_at value (ISO string or datetime) to a Unix timestamp."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TrendingIndex:
+    """
+    Posts ranked by likes with exponential time decay.
+
+    A post's weight is ``(likes + 1) * 2 ** -(age / half_life)``. Every post
+    decays at the same rate, so ranking by the log of the weight can drop
+    the shared ``now`` term:
+
+        score = log2(likes + 1) + created_at / half_life
+
+    Scores then only change when a post's likes change. The index is a list
+    kept sorted with ``bisect``: likes and new posts update one entry, and
+    reading a page is a slice. A periodic rebuild from the database corrects
+    drift from events handled by other workers and drops posts that have
+    aged out of the window.
+    """
+
+    def __init__(self, half_life_hours: float, window_hours: float, max_posts: int):
+        self.half_life = half_life_hours * 3600
+        self.window = timedelta(hours=window_hours)
+        self.max_posts = max_posts
+        self._entries: List[Tuple[float, str]] = []
+        self._scores: Dict[str, float] = {}
+        self._posts: Dict[str, dict] = {}
+        self.rebuilt_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def score(self, post: dict) -> float:
+        """Compute the time-invariant trending score of a post."""
+        likes = max(post.get("likes_count") or 0, 0)
+        return math.log2(likes + 1) + _timestamp(post["created_at"]) / self.half_life
+
+    def _insert(self, post: dict):
+        post_id = post["id"]
+        score = self.score(post)
+        self._scores[post_id] = score
+        self._posts[post_id] = post
+        # Negate the score so the list is ascending with the best post first
+        bisect.insort(self._entries, (-score, post_id))
+
+    def _remove(self, post_id: str) -> Optional[dict]:
+        score = self._scores.pop(post_id, None)
+        if score is None:
+            return None
+        index = bisect.bisect_left(self._entries, (-score, post_id))
+        if index < len(self._entries) and self._entries[index] == (-score, post_id):
+            del self._entries[index]
+        return self._posts.pop(post_id, None)
+
+    def add_post(self, post: dict):
+        """Add a newly created post."""
+        self._remove(post["id"])
+        self._insert(post)
+        # Trim the lowest-ranked post to keep memory bounded
+        while len(self._entries) > self.max_posts:
+            _, post_id = self._entries[-1]
+            self._remove(post_id)
+
+    def update_post(self, post: dict):
+        """Replace a post's data (e.g. an edited caption) if it is indexed."""
+        if post["id"] in self._posts:
+            self._remove(post["id"])
+            self._insert(post)
+
+    def remove_post(self, post_id: str):
+        """Drop a deleted post."""
+        self._remove(post_id)
+
+    def adjust_likes(self, post_id: str, delta: int):
+        """Apply a like (+1) or unlike (-1) to an indexed post."""
+        post = self._remove(post_id)
+        if post is None:
+            return
+        post = {**post, "likes_count": max((post.get("likes_count") or 0) + delta, 0)}
+        self._insert(post)
+
+    def top(self, skip: int = 0, limit: int = 20) -> List[dict]:
+        """Return a page of trending posts, best first."""
+        return [self._posts[post_id] for _, post_id in self._entries[skip:skip + limit]]
+
+    def replace(self, posts: List[dict]):
+        """Swap in a freshly loaded set of posts."""
+        scored = sorted(((-self.score(post), post["id"]) for post in posts))[:self.max_posts]
+        by_id = {post["id"]: post for post in posts}
+        self._entries = scored
+        self._scores = {post_id: -neg_score for neg_score, post_id in scored}
+        self._posts = {post_id: by_id[post_id] for _, post_id in scored}
+        self.rebuilt_at = datetime.now(timezone.utc)
+
+    def load_candidates(self) -> List[dict]:
+        """
+        Fetch the posts that can rank from the database.
+
+        Takes both the most liked and the most recent posts in the window,
+        since a brand new post can outrank an older, more liked one.
+        """
+        cutoff = (datetime.now(timezone.utc) - self.window).isoformat()
+
+        most_liked = (
+            supabase.table("posts")
+            .select(POST_COLUMNS)
+            .gte("created_at", cutoff)
+            .order("likes_count", desc=True)
+            .limit(self.max_posts)
+            .execute()
+        )
+        most_recent = (
+            supabase.table("posts")
+            .select(POST_COLUMNS)
+            .gte("created_at", cutoff)
+            .order("created_at", desc=True)
+            .limit(self.max_posts)
+            .execute()
+        )
+
+        candidates = {post["id"]: post for post in most_liked.data or []}
+        candidates.update({post["id"]: post for post in most_recent.data or []})
+        return list(candidates.values())
+
+    async def rebuild(self):
+        """Reload the index from the database without blocking the event loop."""
+        posts = await asyncio.to_thread(self.load_candidates)
+        self.replace(posts)
+        logger.info(f"Trending index rebuilt with {len(self)} posts")
+
+    async def run_periodic_rebuild(self, interval_seconds: float):
+        """Rebuild the index forever, every ``interval_seconds``."""
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.warning(f"Trending index rebuild failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+trending_index = TrendingIndex(
+    half_life_hours=settings.trending_half_life_hours,
+    window_hours=settings.trending_window_hours,
+    max_posts=settings.trending_max_posts,
+)
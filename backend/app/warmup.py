@@ -0,0 +1,227 @@
+"""Startup warmup and the readiness probe."""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+from app.database import supabase, supabase_admin
+from app.http_pool import HTTP2_AVAILABLE, pool_stats
+from app.utils.cache import get_or_fetch_many, post_cache, user_cache
+from app.utils.projections import POST_COLUMNS, USER_COLUMNS
+from app.utils.trending import trending_index
+
+logger = logging.getLogger(__name__)
+
+# Matches the default page size of GET /api/posts/
+FEED_PAGE_SIZE = 20
+
+# Profiles preloaded: the most frequent authors of the preloaded feed pages
+MAX_HOT_PROFILES = 50
+
+
+def _probe_rest():
+    supabase.table("posts").select("id").limit(1).execute()
+
+
+def _probe_auth():
+    # Tokens are verified by Supabase Auth (auth.get_user), so this is the
+    # connection every authenticated request needs first
+    supabase.auth._request("GET", "health")
+
+
+def _probe_storage():
+    supabase_admin.storage.list_buckets()
+
+
+# Cheapest request per upstream, used both to open connections and to
+# measure latency
+UPSTREAM_PROBES: Dict[str, Callable[[], None]] = {
+    "rest": _probe_rest,
+    "auth": _probe_auth,
+    "storage": _probe_storage,
+}
+
+
+async def probe(fn: Callable[[], None], timeout: float) -> Dict:
+    """
+    Time one blocking upstream call in a thread.
+
+    Returns:
+        ``ok``, ``latency_ms`` and, on failure, ``error``
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(fn), timeout)
+        result = {"ok": True}
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"timed out after {timeout}s"}
+    except Exception as e:
+        result = {"ok": False, "error": str(e) or type(e).__name__}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+async def probe_upstreams(timeout: float) -> Dict[str, Dict]:
+    """Probe every upstream concurrently."""
+    results = await asyncio.gather(*(probe(fn, timeout) for fn in UPSTREAM_PROBES.values()))
+    return dict(zip(UPSTREAM_PROBES, results))
+
+
+def preload_feed(pages: int) -> List[dict]:
+    """Load the newest feed pages into the post cache."""
+    posts = (
+        supabase.table("posts")
+        .select(POST_COLUMNS)
+        .order("created_at", desc=True)
+        .limit(pages * FEED_PAGE_SIZE)
+        .execute()
+    ).data or []
+    for post in posts:
+        post_cache.set(post["id"], post)
+    return posts
+
+
+def preload_profiles(posts: List[dict]) -> int:
+    """Load the profiles of the most frequent authors into the user cache."""
+    authors = Counter(post["user_id"] for post in posts).most_common(MAX_HOT_PROFILES)
+    if not authors:
+        return 0
+    users = get_or_fetch_many(
+        user_cache,
+        [user_id for user_id, _ in authors],
+        lambda ids: supabase.table("users").select(USER_COLUMNS).in_("id", ids).execute().data or [],
+    )
+    return len(users)
+
+
+class Warmup:
+    """
+    Warm a worker up before it takes traffic.
+
+    Opens connections to PostgREST, Auth and Storage (several to PostgREST
+    over HTTP/1.1, where concurrent requests need their own connection),
+    then preloads the newest feed pages and their authors' profiles into
+    the row caches. Each step is recorded; a failed step is logged and
+    does not stop the others. The readiness probe reports the worker as
+    not ready until this has finished.
+    """
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    async def run(self, connections: int, feed_pages: int, timeout: float):
+        """
+        Run every warmup step, giving up after ``timeout`` seconds.
+
+        Args:
+            connections: PostgREST connections to open (one with HTTP/2)
+            feed_pages: Feed pages to preload
+            timeout: Upper bound for the whole warmup
+        """
+        self.started_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._run_steps(connections, feed_pages), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Warmup did not finish within {timeout}s")
+        finally:
+            self.finished_at = time.monotonic()
+        logger.info(f"Warmup finished in {self.finished_at - self.started_at:.2f}s: {self.steps}")
+
+    def skip(self):
+        """Mark the warmup as done without running it (warmup disabled)."""
+        self.started_at = self.finished_at = time.monotonic()
+
+    async def _run_steps(self, connections: int, feed_pages: int):
+        rest_connections = 1 if settings.http2 and HTTP2_AVAILABLE else max(connections, 1)
+        probes = [probe(_probe_rest, settings.ready_probe_timeout_seconds) for _ in range(rest_connections)]
+        probes += [probe(fn, settings.ready_probe_timeout_seconds) for fn in (_probe_auth, _probe_storage)]
+
+        results, posts = await asyncio.gather(
+            asyncio.gather(*probes),
+            self._step("feed", lambda: preload_feed(feed_pages), len),
+        )
+        self.steps["connections"] = {
+            "ok": all(result["ok"] for result in results),
+            "opened": sum(1 for result in results if result["ok"]),
+        }
+
+        if posts:
+            await self._step("profiles", lambda: preload_profiles(posts))
+
+    async def _step(self, name: str, fn: Callable, count: Callable = lambda result: result):
+        """Run one blocking step in a thread and record its outcome."""
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(fn)
+            self.steps[name] = {"ok": True, "loaded": count(result)}
+        except Exception as e:
+            logger.warning(f"Warmup step {name} failed: {str(e)}")
+            self.steps[name] = {"ok": False, "error": str(e)}
+            result = None
+        self.steps[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "done": self.done,
+            "duration_ms": (
+                round((self.finished_at - self.started_at) * 1000, 1) if self.done else None
+            ),
+            "steps": self.steps,
+        }
+
+
+class ReadinessProbe:
+    """
+    Decide whether a worker should receive traffic.
+
+    A worker is ready once its warmup has finished and every upstream
+    answers. Probe results are reused for ``cache_seconds``, so frequent
+    load balancer checks cost at most one round of upstream requests per
+    interval; concurrent checks share the same round.
+    """
+
+    def __init__(self, timeout: float, cache_seconds: float):
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self._upstreams: Optional[Dict[str, Dict]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def upstreams(self) -> Dict[str, Dict]:
+        """Latest upstream probe results, probing again if they are stale."""
+        async with self._lock:
+            if self._upstreams is None or time.monotonic() - self._checked_at >= self.cache_seconds:
+                self._upstreams = await probe_upstreams(self.timeout)
+                self._checked_at = time.monotonic()
+            return self._upstreams
+
+    async def check(self) -> Dict:
+        """
+        Readiness report.
+
+        Returns:
+            ``ready``, the warmup state, upstream latencies, the shared
+            pool's connections and whether the trending index is loaded
+        """
+        upstreams = await self.upstreams()
+        return {
+            "ready": warmup.done and all(result["ok"] for result in upstreams.values()),
+            "warmup": warmup.stats(),
+            "upstreams": upstreams,
+            "pool": pool_stats(),
+            "trending_loaded": trending_index.rebuilt_at is not None,
+        }
+
+
+warmup = Warmup()
+readiness = ReadinessProbe(settings.ready_probe_timeout_seconds, settings.ready_probe_cache_seconds)
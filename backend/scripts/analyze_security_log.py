@@ -0,0 +1,51 @@
+"""
+Summarize logs/security.log: top IPs, paths, statuses and auth failures.
+
+Only the part of the log written since the previous run is parsed; the
+aggregates so far are kept next to the log (security.log.state.json).
+
+Usage (from the backend directory):
+    python -m scripts.analyze_security_log
+    python -m scripts.analyze_security_log --hours 1 --top 10
+    python -m scripts.analyze_security_log --log /var/log/postcard/security.log --rebuild
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import orjson
+
+from app.config import settings
+from app.utils.security_log import SecurityLogAnalyzer, default_state_path
+
+DEFAULT_LOG = Path(__file__).resolve().parent.parent / "logs" / "security.log"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize the security log.")
+    parser.add_argument("--log", type=Path, default=DEFAULT_LOG, help="Log file to analyze")
+    parser.add_argument("--hours", type=int, default=24, help="Window to summarize, in hours")
+    parser.add_argument("--top", type=int, default=20, help="IPs and paths to list")
+    parser.add_argument("--rebuild", action="store_true", help="Discard saved aggregates and re-read the log")
+    args = parser.parse_args()
+
+    state_path = default_state_path(args.log)
+    if args.rebuild:
+        state_path.unlink(missing_ok=True)
+
+    analyzer = SecurityLogAnalyzer(
+        args.log,
+        retention_hours=settings.security_log_retention_hours,
+        state_path=state_path,
+    )
+    parsed = analyzer.refresh()
+    print(f"Parsed {parsed} new security log lines", file=sys.stderr)
+
+    summary = analyzer.summary(args.hours, args.top)
+    print(orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
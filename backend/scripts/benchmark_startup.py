@@ -0,0 +1,92 @@
+"""
+Measure worker startup time.
+
+Each run starts a fresh interpreter (like a new worker) and times three
+phases: importing ``app.main``, the app's lifespan startup, and the first
+request (``GET /health`` in-process, no network). Medians over all runs
+are reported, so the numbers can be compared before and after a change.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_startup
+    python -m scripts.benchmark_startup --runs 20 --path /api/posts/
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import orjson
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in the fresh interpreter; prints one JSON object of timings (ms)
+WORKER = """
+import asyncio, sys, time
+
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+import httpx, orjson
+
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            await client.get(sys.argv[1])
+        first_request = time.perf_counter()
+    return started, first_request
+
+
+started, first_request = asyncio.run(boot())
+print(orjson.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_request_ms": (first_request - started) * 1000,
+    "total_ms": (first_request - start) * 1000,
+}).decode())
+"""
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+
+
+def run_once(path: str) -> dict:
+    """Boot the app in a new interpreter and return its timings."""
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER, path],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Only the last line: startup may log to stdout
+    return orjson.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure worker startup time.")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters to start")
+    parser.add_argument("--path", default="/health", help="Path of the first request")
+    args = parser.parse_args()
+
+    try:
+        runs = [run_once(args.path) for _ in range(args.runs)]
+    except subprocess.CalledProcessError as e:
+        print(e.stderr, file=sys.stderr)
+        return 1
+
+    print(f"{'phase':<18}{'median':>10}{'min':>10}{'max':>10}")
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        print(
+            f"{phase:<18}{statistics.median(values):>10.1f}"
+            f"{min(values):>10.1f}{max(values):>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
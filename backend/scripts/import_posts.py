@@ -0,0 +1,83 @@
+"""
+Bulk import posts from an NDJSON file.
+
+Each line is one post: the ``PostCreate`` fields plus ``user_id`` and an
+optional original ``created_at``. Progress is checkpointed to a file, so
+an interrupted import picks up where it stopped when run again.
+
+Usage (from the backend directory):
+    python -m scripts.import_posts posts.ndjson
+    python -m scripts.import_posts posts.ndjson --checkpoint-file posts.ckpt --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.config import settings
+from app.utils.post_import import PostImporter
+
+
+async def read_lines(path: Path) -> AsyncIterator[bytes]:
+    """Yield the lines of a file."""
+    with path.open("rb") as source:
+        for line in source:
+            yield line
+
+
+def load_checkpoint(path: Path) -> int:
+    """Read the last checkpoint, or 0 if there is none."""
+    try:
+        return int(path.read_text().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path: Path, line: int):
+    """Write a checkpoint atomically, so a crash never leaves it half-written."""
+    partial = path.with_suffix(path.suffix + ".tmp")
+    partial.write_text(str(line))
+    os.replace(partial, path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import posts from an NDJSON file.")
+    parser.add_argument("source", type=Path, help="NDJSON file, one post per line")
+    parser.add_argument(
+        "--checkpoint-file",
+        type=Path,
+        help="Where to record progress (default: <source>.checkpoint)",
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    parser.add_argument("--parallel", type=int, default=settings.import_max_parallel)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    checkpoint_file = args.checkpoint_file or args.source.with_name(args.source.name + ".checkpoint")
+    resume_from = 0 if args.restart else load_checkpoint(checkpoint_file)
+    if resume_from:
+        print(f"Resuming after line {resume_from}", file=sys.stderr)
+
+    importer = PostImporter(
+        batch_size=args.batch_size,
+        max_parallel=args.parallel,
+        resume_from=resume_from,
+        on_checkpoint=lambda line: save_checkpoint(checkpoint_file, line),
+    )
+    report = asyncio.run(importer.run(read_lines(args.source)))
+
+    for error in report.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    print(report.model_dump_json(exclude={"errors"}, indent=2))
+
+    if report.aborted:
+        print(f"{report.aborted}; run again to resume after line {report.checkpoint}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Test setup: settings the app needs at import, with no real Supabase project."""
+
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
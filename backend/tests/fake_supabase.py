@@ -0,0 +1,67 @@
+"""In-memory stand-in for the Supabase client's table queries."""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List
+
+
+class FakeQuery:
+    """Records one table query and runs it against in-memory rows on execute()."""
+
+    def __init__(self, rows: List[dict], writable: bool):
+        self.rows = rows
+        self.writable = writable
+        self.filters = []
+        self.values = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def update(self, values: dict):
+        self.values = values
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column: str, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    def execute(self):
+        matched = [row for row in self.rows if all(match(row) for match in self.filters)]
+        if self.values is not None:
+            if not self.writable:
+                matched = []
+            for row in matched:
+                row.update(self.values)
+                row["updated_at"] = datetime.now(timezone.utc).isoformat()
+        return SimpleNamespace(data=[dict(row) for row in matched], count=None)
+
+
+class FakeClient:
+    """
+    A client whose tables are lists of rows.
+
+    With ``writable=False`` updates match no rows, as with the anon key
+    against the RLS policies that only let users write their own rows.
+    """
+
+    def __init__(self, tables: Dict[str, List[dict]], writable: bool = True):
+        self.tables = tables
+        self.writable = writable
+        self.rpc_results: Dict[str, List[dict]] = {}
+        self.rpc_calls: List[tuple] = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.tables.setdefault(name, []), self.writable)
+
+    def rpc(self, fn: str, params: dict):
+        """Record the call; it returns ``rpc_results[fn]`` (no rows by default)."""
+        self.rpc_calls.append((fn, params))
+        data = self.rpc_results.get(fn, [])
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data, count=None))
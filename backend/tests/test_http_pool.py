@@ -0,0 +1,24 @@
+"""The shared pool must survive the client rebuilding its sub-clients."""
+
+from app.config import settings
+from app.database import _create_pooled_client
+from app.http_pool import shared_transport
+
+
+def _transports(client):
+    return client.postgrest.session._transport, client.storage.session._transport
+
+
+def test_sub_clients_use_shared_pool():
+    client = _create_pooled_client(settings.supabase_url, settings.supabase_key)
+
+    assert _transports(client) == (shared_transport(), shared_transport())
+    assert client.auth._http_client._transport is shared_transport()
+
+
+def test_sub_clients_keep_shared_pool_after_auth_events():
+    client = _create_pooled_client(settings.supabase_url, settings.supabase_key)
+
+    for event in ("SIGNED_IN", "TOKEN_REFRESHED", "SIGNED_OUT"):
+        client._listen_to_auth_events(event, None)
+        assert _transports(client) == (shared_transport(), shared_transport())
@@ -0,0 +1,49 @@
+"""RowSerializer output must match FastAPI's response_model serialization."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.schemas.post import Post
+from app.schemas.user import User
+from app.utils.responses import RowSerializer
+
+USER_ROW = {
+    "id": "u1",
+    "email": "Ada.Lovelace@Example.COM",
+    "username": "ada",
+    "first_name": "Ada",
+    "last_name": None,
+    "avatar_url": None,
+    "bio": None,
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": "2026-01-02T03:04:05.123456+00:00",
+}
+
+POST_ROW = {
+    "id": "p1",
+    "user_id": "u1",
+    "caption": "Hello",
+    "post_type": "photo",
+    "image_url": None,
+    "tags": ["sea"],
+    "likes_count": 3,
+    "created_at": "2026-01-01T00:00:00+00:00",
+    "updated_at": None,
+}
+
+
+def _response_model_bytes(model, row: dict) -> bytes:
+    """Serialize a row the way FastAPI does for a route's response_model."""
+    app = FastAPI()
+    app.get("/row", response_model=model)(lambda: row)
+    return TestClient(app).get("/row").content
+
+
+@pytest.mark.parametrize("model, row", [(User, USER_ROW), (Post, POST_ROW)])
+def test_dumps_matches_response_model(model, row):
+    assert RowSerializer(model).dumps(dict(row)) == _response_model_bytes(model, row)
+
+
+def test_email_domain_is_normalized():
+    assert b'"Ada.Lovelace@example.com"' in RowSerializer(User).dumps(dict(USER_ROW))
@@ -0,0 +1,44 @@
+"""Signing a page of private media against a mocked Storage API."""
+
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.utils import signed_urls
+from app.utils.signed_urls import SignedUrlCache, sign_media_rows
+
+STORAGE_URL = "http://localhost:54321/storage/v1"
+
+
+def _storage_api(request: httpx.Request) -> httpx.Response:
+    """Sign every path except missing.png, which has no object."""
+    paths = json.loads(request.content)["paths"]
+    return httpx.Response(200, json=[
+        {"path": path, "error": "Either the object does not exist or you do not have access to it", "signedURL": None}
+        if path == "missing.png" else
+        {"path": path, "error": None, "signedURL": f"/object/sign/private/{path}?token=t"}
+        for path in paths
+    ])
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    session = httpx.Client(base_url=STORAGE_URL, transport=httpx.MockTransport(_storage_api))
+    monkeypatch.setattr(signed_urls, "supabase_admin", SimpleNamespace(storage=SimpleNamespace(session=session)))
+    monkeypatch.setattr(signed_urls, "signed_url_cache", SignedUrlCache(100, 3600, 300))
+    monkeypatch.setattr(settings, "private_media_buckets", ["private"])
+
+
+def test_missing_object_does_not_fail_the_page(storage):
+    rows = [
+        {"id": "1", "image_url": f"{STORAGE_URL}/object/public/private/ok.png"},
+        {"id": "2", "image_url": f"{STORAGE_URL}/object/public/private/missing.png"},
+    ]
+
+    signed = sign_media_rows(rows, ["image_url"])
+
+    assert signed[0]["image_url"] == f"{STORAGE_URL}/object/sign/private/ok.png?token=t"
+    assert signed[1]["image_url"] == rows[1]["image_url"]
@@ -0,0 +1,88 @@
+"""User routes against an in-memory users table."""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import users
+from app.utils import storage
+from app.utils.auth import get_current_user
+from tests.fake_supabase import FakeClient
+
+UPDATED_AT = "2026-01-01T00:00:00+00:00"
+STORAGE_URL = "http://localhost:54321/storage/v1/object/public/avatars/blobs"
+OLD_HASH = "a" * 64
+NEW_HASH = "b" * 64
+
+
+@pytest.fixture
+def profile(monkeypatch):
+    row = {
+        "id": "u1",
+        "email": "ada@example.com",
+        "username": "ada",
+        "avatar_url": f"{STORAGE_URL}/{OLD_HASH}.png",
+        "created_at": UPDATED_AT,
+        "updated_at": UPDATED_AT,
+    }
+    tables = {"users": [row]}
+    # The server uses the anon key without a user session, so RLS lets it write no rows
+    monkeypatch.setattr(users, "supabase", FakeClient(tables, writable=False))
+    monkeypatch.setattr(users, "supabase_admin", FakeClient(tables))
+    monkeypatch.setattr(storage, "supabase_admin", FakeClient({}))
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="u1")
+    yield row
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_update_profile_with_current_etag(profile):
+    client = TestClient(app)
+    etag = users.user_rows.entity_tag(dict(profile), users.USER_VERSION_FIELDS)
+
+    response = client.put("/api/users/me", json={"username": "ada2"}, headers={"If-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "ada2"
+
+
+def test_update_profile_with_current_updated_at(profile):
+    client = TestClient(app)
+
+    response = client.put("/api/users/me", json={"username": "ada2"}, headers={"If-Match": UPDATED_AT})
+
+    assert response.status_code == 200
+
+
+def test_update_profile_with_stale_version(profile):
+    client = TestClient(app)
+    etag = users.user_rows.entity_tag(dict(profile), users.USER_VERSION_FIELDS)
+    profile["updated_at"] = "2026-01-02T00:00:00+00:00"
+
+    response = client.put("/api/users/me", json={"username": "ada2"}, headers={"If-Match": etag})
+
+    assert response.status_code == 412
+    assert profile["username"] == "ada"
+
+
+def test_update_avatar_moves_blob_references(profile):
+    client = TestClient(app)
+    storage.supabase_admin.rpc_results["acquire_media_blobs"] = [{"content_hash": NEW_HASH}]
+
+    response = client.put("/api/users/me", json={"avatar_url": f"{STORAGE_URL}/{NEW_HASH}.png"})
+
+    assert response.status_code == 200
+    calls = [(fn, params.get("p_hashes")) for fn, params in storage.supabase_admin.rpc_calls]
+    assert ("acquire_media_blobs", [NEW_HASH]) in calls
+    assert ("release_media_blobs", [OLD_HASH]) in calls
+
+
+def test_update_avatar_to_purged_blob(profile):
+    client = TestClient(app)
+
+    response = client.put("/api/users/me", json={"avatar_url": f"{STORAGE_URL}/{NEW_HASH}.png"})
+
+    assert response.status_code == 409
+    assert profile["avatar_url"] == f"{STORAGE_URL}/{OLD_HASH}.png"
+    assert all(fn != "release_media_blobs" for fn, _ in storage.supabase_admin.rpc_calls)